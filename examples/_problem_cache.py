@@ -0,0 +1,58 @@
+# Pod Repositioning Problem
+# Copyright (C) 2017, 2018 Arbeitsgruppe OR an der Leuphana Universität Lüneburg
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Load test problems of the examples only once.
+
+Parsing the layout, the initial state and the departures is done on the first call only. The loaded warehouse is
+pickled to a cache file next to this module, see :func:`prp.utils.load_cached_warehouse`.
+Every call to :func:`load_problem` returns a new warehouse, because the examples change the warehouse while solving.
+"""
+import hashlib
+import os.path
+
+import prp.recorder as recorder
+import prp.xy as xy
+import prp.utils as utils
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__")
+
+
+def _parse_problem(layout_file, initial_state_file, departures_file):
+    """Load a warehouse from JSON files."""
+    layout = xy.Layout()
+    with open(layout_file, 'r') as infile:
+        layout.load_from_json(infile)
+    warehouse = layout.get_empty_warehouse()
+    warehouse.set_costs(layout.get_costs())
+    with open(initial_state_file, 'r') as infile:
+        recorder.load_initial_state_from_json(infile, warehouse)
+    with open(departures_file, 'r') as infile:
+        departures = recorder.load_departures_from_json(infile)
+    warehouse.set_departure_generator(departures)
+    return warehouse
+
+
+def _cache_file(files):
+    key = "|".join(os.path.abspath(f) for f in files)
+    return os.path.join(CACHE_DIR, "problem-{}.pkl".format(hashlib.sha1(key.encode()).hexdigest()))
+
+
+def load_problem(layout_file, initial_state_file, departures_file):
+    """Load a warehouse with costs, initial state and departures.
+
+    :return: a new warehouse object on every call.
+    """
+    files = (layout_file, initial_state_file, departures_file)
+    return utils.load_cached_warehouse(_cache_file(files), _parse_problem, *files)
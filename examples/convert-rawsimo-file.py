@@ -34,6 +34,8 @@ LAYOUT_XML_FILE = "../data/rawsimo/1-1-2-10-441-b-slow-pick-cap-20.xinst"
 LAYOUT_FILE = "../data/504-layout.json"
 INITIAL_STATE_FILE = "../data/504-initial-state.json"
 COSTS_FILE = "../data/504-costs.json"
+# The same costs as numpy matrices. Load them with recorder.load_costs_from_npy.
+COSTS_NPY_FILE = "../data/504-costs.npy"
 
 NQ1 = 6  # Maximal queue length at the station 1.
 NQ2 = 4  # Maximal queue length at the station 2.
@@ -54,6 +56,8 @@ print("Store costs...")
 utils.create_missing_directories_of_file(COSTS_FILE)
 with open(COSTS_FILE, 'w') as outfile:
     recorder.store_costs_to_json(warehouse.costs, outfile)
+with open(COSTS_NPY_FILE, 'wb') as outfile:
+    recorder.store_costs_to_npy(warehouse.costs, outfile)
 print("Costs stored.")
 
 # Create layout.
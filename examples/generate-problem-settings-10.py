@@ -84,10 +84,11 @@ for place in warehouse.places:
 
 #Calculate weights of the pods, such that the ratio between the most and the least frequent pods is MAX_WEIGHT_RATIO.
 pod_w = departure_generators.get_geometric_weights(npods=NPODS, max_weight_ratio=MAX_WEIGHT_RATIO)
-# Use equal station weights.
+# Use equal station weights. Nothing else draws numpy random numbers while the departures are generated,
+# so the random numbers of all departures can be drawn at once.
 generator = departure_generators.MarkovianGenerator(warehouse,
                                                     pod_w, STATION_WEIGHTS,
-                                                    MAX_TIME)
+                                                    MAX_TIME, batch_size=MAX_TIME)
 departure_recorder = recorder.DepartureRecorder(generator)
 warehouse.set_departure_generator(departure_recorder)
 
@@ -30,12 +30,13 @@ two stations with queue of the length 3 and 1000 pod departures.
 import sys
 sys.path.append('../')  # noqa: E402
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from prp.solvers.simple import CheapestPlaceSolver, PlaybackSolver
 import prp.recorder as recorder
-import prp.xy as xy
 import prp.stats
 import prp.utils as utils
 import prp.solvers.bip as bip
+from _problem_cache import load_problem
 
 LAYOUT_FILE = "../data/10-layout.json"
 INITIAL_STATE_FILE = "../data/10-initial-state.json"
@@ -46,41 +47,27 @@ DEPARTURES_FILE = "../data/10-departures.json"
 SOLUTION_FILE = "../data/solutions/10-bip-solution.json"
 
 
-def load_problem():
-    """Load a test system with 10 places and 10 pods randomly distributed among them."""
-    layout = xy.Layout()
-    with open(LAYOUT_FILE, 'r') as infile:
-        layout.load_from_json(infile)
-    warehouse = layout.get_empty_warehouse()
-    with open(INITIAL_STATE_FILE, 'r') as infile:
-        recorder.load_initial_state_from_json(infile, warehouse)
-    with open(DEPARTURES_FILE, 'r') as infile:
-        departures = recorder.load_departures_from_json(infile)
-    warehouse.set_departure_generator(departures)
-    costs = layout.get_costs()
-    warehouse.set_costs(costs)
-    return warehouse
-
-
 def get_cheapest_place_costs(warehouse):
     """Return costs when using cheapest-place solver with costs from station."""
     warehouse = prp.stats.copy_warehouse(warehouse)
     solver = CheapestPlaceSolver(warehouse, warehouse.costs)
 
     while not warehouse.finished():
-        place_id = solver.decide_new_place()
+        (place_id, _, _) = solver.decide_new_place()
         warehouse.next(place_id)
 
     return warehouse.total_costs
 
 
-warehouse = load_problem()
+warehouse = load_problem(LAYOUT_FILE, INITIAL_STATE_FILE, DEPARTURES_FILE)
 
 print("Running BIB solver.")
 logging.basicConfig(level=logging.DEBUG)
-upper_costs = get_cheapest_place_costs(warehouse)
-print("Use upper costs bound {} as an upper costs bound.".format(upper_costs))
-(solution, problem) = bip.solve(warehouse, threads=4, costs_upper_bound=upper_costs)
+# Calculate the upper costs bound with the cheapest-place solver in another process while the BIP model is built.
+with ProcessPoolExecutor(max_workers=1) as executor:
+    upper_costs = executor.submit(get_cheapest_place_costs, warehouse)
+    (solution, problem) = bip.solve(warehouse, threads=4, costs_upper_bound=upper_costs)
+print("Used upper costs bound {} as an upper costs bound.".format(upper_costs.result()))
 
 # Save the results.
 utils.create_missing_directories_of_file(SOLUTION_FILE)
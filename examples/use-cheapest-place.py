@@ -33,8 +33,8 @@ sys.path.append('../')  # noqa: E402
 
 from prp.solvers.simple import CheapestPlaceSolver, CostsType
 import prp.recorder as recorder
-import prp.xy as xy
 import prp.utils as utils
+from _problem_cache import load_problem
 
 # Input files
 LAYOUT_FILE = "../data/10-layout.json"
@@ -45,23 +45,7 @@ DEPARTURES_FILE = "../data/10-departures.json"
 SOLUTION_FILE = "../data/solutions/10-cheapest-place-solution.json"
 
 
-def load_problem():
-    """Load a test system with 10 places and 10 pods randomly distributed among them."""
-    layout = xy.Layout()
-    with open(LAYOUT_FILE, 'r') as infile:
-        layout.load_from_json(infile)
-        warehouse = layout.get_empty_warehouse()
-        costs = layout.get_costs()
-        warehouse.set_costs(costs)
-    with open(INITIAL_STATE_FILE, 'r') as infile:
-        recorder.load_initial_state_from_json(infile, warehouse)
-    with open(DEPARTURES_FILE, 'r') as infile:
-        departures = recorder.load_departures_from_json(infile)
-        warehouse.set_departure_generator(departures)
-    return warehouse
-
-
-warehouse = load_problem()
+warehouse = load_problem(LAYOUT_FILE, INITIAL_STATE_FILE, DEPARTURES_FILE)
 
 print("Use cheapest-place algorithm with full costs (from and to station).")
 # Use cheapest place solver. For the costs use full costs of the decision. That means
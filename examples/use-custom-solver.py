@@ -28,28 +28,18 @@
 """
 import sys
 sys.path.append('../')  # noqa: E402
-import math
+import numpy
 import prp.recorder as recorder
 from prp.core.warehouse import Warehouse
-import prp.xy as xy
 import prp.utils
 from prp.core.objects import INVALID_ID
+from prp.core.costs import get_cost_matrices
+from _problem_cache import load_problem
 
-
-def load_problem():
-    """Load a test system with 10 places and 10 pods randomly distributed among them."""
-    layout = xy.Layout()
-    with open("../data/10-layout.json", 'r') as infile:
-        layout.load_from_json(infile)
-        warehouse = layout.get_empty_warehouse()
-        costs = layout.get_costs()
-        warehouse.set_costs(costs)
-    with open("../data/10-initial-state.json", 'r') as infile:
-        recorder.load_initial_state_from_json(infile, warehouse)
-    with open("../data/10-departures.json", 'r') as infile:
-        departures = recorder.load_departures_from_json(infile)
-        warehouse.set_departure_generator(departures)
-    return warehouse
+# Input files
+LAYOUT_FILE = "../data/10-layout.json"
+INITIAL_STATE_FILE = "../data/10-initial-state.json"
+DEPARTURES_FILE = "../data/10-departures.json"
 
 
 class MySolver:
@@ -57,6 +47,15 @@ class MySolver:
 
     def __init__(self, warehouse: Warehouse):
         self.warehouse = warehouse
+        # Decisions (pod, station, place, time) are collected here and printed after solving.
+        self.log = []
+        # For every station: places sorted by costs from the station, the cheapest first.
+        # Stable sort keeps places with equal costs in the order of their IDs.
+        from_station, _ = get_cost_matrices(warehouse.costs, station_ids=warehouse.stations.keys(),
+                                           place_ids=warehouse.places)
+        self.sorted_places = {}
+        for station_id in warehouse.stations.keys():
+            self.sorted_places[station_id] = (numpy.argsort(from_station[station_id, 1:], kind='stable') + 1).tolist()
 
     def decide_new_place(self):
         """Put the pod to the cheapest available place."""
@@ -66,21 +65,20 @@ class MySolver:
         if pod == INVALID_ID:
             return INVALID_ID
 
+        # The first available place in the sorted list is the cheapest one.
+        available_places = frozenset(self.warehouse.available_places)
         cheapest_place_so_far = INVALID_ID
-        costs_so_far = math.inf
-        for place_id in self.warehouse.available_places:
-            curr_costs = self.warehouse.costs.from_station(station_id, place_id)
-            if curr_costs < costs_so_far:
+        for place_id in self.sorted_places[station_id]:
+            if place_id in available_places:
                 cheapest_place_so_far = place_id
-                costs_so_far = curr_costs
+                break
 
-        print("Pod {} from {} arrives to place {} at t {}.".format(
-            pod, station_id, cheapest_place_so_far, self.warehouse.t + 1))
+        self.log.append((pod, station_id, cheapest_place_so_far, self.warehouse.t + 1))
 
         return cheapest_place_so_far
 
 
-warehouse = load_problem()
+warehouse = load_problem(LAYOUT_FILE, INITIAL_STATE_FILE, DEPARTURES_FILE)
 solver = MySolver(warehouse)
 
 # Store solution.
@@ -91,6 +89,7 @@ while not warehouse.finished():
     solution.append(place_id)
     warehouse.next(place_id)
 
+sys.stdout.write("".join("Pod {} from {} arrives to place {} at t {}.\n".format(*entry) for entry in solver.log))
 print("Total costs: {} at time {}.".format(warehouse.total_costs, warehouse.t))
 
 SOLUTION_FILE = "../data/solutions/10-cheapest-place-solution.json"
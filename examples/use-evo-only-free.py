@@ -33,7 +33,6 @@ The test instance has 10 places, 10 pods, two stations with queue of the length
 import sys
 sys.path.append('../')  # noqa: E402
 
-import copy
 import random  # For seed.
 import array
 import csv
@@ -45,12 +44,12 @@ from deap import creator
 from deap import tools
 
 import prp.recorder as recorder
-import prp.xy as xy
 import prp.utils as utils
 from prp.solvers.simple import CostsType
 import prp.solvers.evo_simple as evo_simple
 import prp.solvers.evolution_only_free as evo
 from prp.solvers.optimal_fixed import get_place_costs
+from _problem_cache import load_problem
 
 
 # Input files.
@@ -70,24 +69,8 @@ MAX_GENERATIONS = 100000
 MAX_NO_IMPROVEMENTS = 100
 
 
-def load_problem():
-    """Load a test system with 10 places and 10 pods randomly distributed among them."""
-    layout = xy.Layout()
-    with open(LAYOUT_FILE, 'r') as infile:
-        layout.load_from_json(infile)
-        warehouse = layout.get_empty_warehouse()
-        costs = layout.get_costs()
-        warehouse.set_costs(costs)
-    with open(INITIAL_STATE_FILE, 'r') as infile:
-        recorder.load_initial_state_from_json(infile, warehouse)
-    with open(DEPARTURES_FILE, 'r') as infile:
-        departures = recorder.load_departures_from_json(infile)
-        warehouse.set_departure_generator(departures)
-    return warehouse
-
-
 def get_place_ordered_by_avg_costs():
-    wh = load_problem()
+    wh = load_problem(LAYOUT_FILE, INITIAL_STATE_FILE, DEPARTURES_FILE)
     avg_costs = get_place_costs(wh)
     places = list(avg_costs.keys())
     return list(sorted(places, key=lambda x: avg_costs[x]))
@@ -98,14 +81,15 @@ def get_place_ordered_by_avg_costs():
 PLACE_ORDER = get_place_ordered_by_avg_costs()
 print("Use place order: {}".format(PLACE_ORDER))
 
-warehouse = load_problem()
+warehouse = load_problem(LAYOUT_FILE, INITIAL_STATE_FILE, DEPARTURES_FILE)
 helper = evo.Helper(warehouse, PLACE_ORDER)
 
 creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
 creator.create("Individual", array.array, typecode="l", fitness=creator.FitnessMin)
 toolbox = base.Toolbox()
-initial_solution = helper.cheapest_place_solution(CostsType.DECISION)
-toolbox.register("initialSolution", copy.deepcopy, initial_solution)
+initial_solution = array.array("l", helper.cheapest_place_solution(CostsType.DECISION))
+# The genes are plain integers, a flat copy of the array is enough.
+toolbox.register("initialSolution", array.array, "l", initial_solution)
 toolbox.register("individual", tools.initIterate, creator.Individual, toolbox.initialSolution)
 toolbox.register("population", tools.initRepeat, list, toolbox.individual)
 toolbox.register("mate", tools.cxTwoPoint)
@@ -31,21 +31,21 @@ two stations with queue of the length 3 and 1000 pod departures.
 import sys
 sys.path.append('../')  # noqa: E402
 
-import copy
 import random  # For seed.
-import array
 import csv
-import multiprocessing
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy
 from deap import base
 from deap import creator
 from deap import tools
 import prp.recorder as recorder
-import prp.xy as xy
 import prp.utils as utils
 
 import prp.solvers.evolution as evo
 import prp.solvers.evo_simple as evo_simple
+from _problem_cache import load_problem
 
 
 # Input files
@@ -59,41 +59,40 @@ SOLUTION_FILE = "../data/solutions/10-evo-solution.json"
 CSV_FILE = "../data/evo-intermediate-from-rnd-results.csv"
 
 random.seed(7)
+numpy.random.seed(7)
 POPULATION_SIZE = 100
 MAX_GENERATIONS = 100000
 MAX_NO_IMPROVEMENTS = 100
 
+# Evaluation helper of a worker process.
+_worker_helper = None
 
-def load_problem():
-    """Load a test system with 10 places and 10 pods randomly distributed among them."""
-    layout = xy.Layout()
-    with open(LAYOUT_FILE, 'r') as infile:
-        layout.load_from_json(infile)
-        warehouse = layout.get_empty_warehouse()
-        costs = layout.get_costs()
-        warehouse.set_costs(costs)
-    with open(INITIAL_STATE_FILE, 'r') as infile:
-        recorder.load_initial_state_from_json(infile, warehouse)
-    with open(DEPARTURES_FILE, 'r') as infile:
-        departures = recorder.load_departures_from_json(infile)
-        warehouse.set_departure_generator(departures)
-    return warehouse
 
+def _init_worker(layout_file, initial_state_file, departures_file):
+    """Load the problem once per worker process instead of sending it with every evaluation."""
+    global _worker_helper
+    _worker_helper = evo.Helper(load_problem(layout_file, initial_state_file, departures_file))
 
-warehouse = load_problem()
+
+def _evaluate(individual):
+    return _worker_helper.evaluate(individual)
+
+
+warehouse = load_problem(LAYOUT_FILE, INITIAL_STATE_FILE, DEPARTURES_FILE)
 helper = evo.Helper(warehouse)
 
 creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
-creator.create("Individual", array.array, typecode="L", fitness=creator.FitnessMin)
+# Individuals are numpy arrays. Crossover and mutation work then on whole slices and masks.
+creator.create("Individual", numpy.ndarray, fitness=creator.FitnessMin)
 toolbox = base.Toolbox()
-initial_solution = helper.random_solution()
-toolbox.register("initialSolution", copy.deepcopy, initial_solution)
+initial_solution = numpy.array(helper.random_solution(), dtype=numpy.int32)
+# The genes are plain integers, a flat copy of the array is enough.
+toolbox.register("initialSolution", initial_solution.copy)
 toolbox.register("individual", tools.initIterate, creator.Individual, toolbox.initialSolution)
 toolbox.register("population", tools.initRepeat, list, toolbox.individual)
-toolbox.register("mate", tools.cxTwoPoint)
-toolbox.register("mutate", tools.mutUniformInt, low=helper.min_action(),
+toolbox.register("mate", evo_simple.cx_two_point_np)
+toolbox.register("mutate", evo_simple.mut_uniform_int_np, low=helper.min_action(),
                  up=helper.max_action(), indpb=3.0 / len(initial_solution))
-toolbox.register("evaluate", helper.evaluate)
 toolbox.register("select", tools.selTournament, tournsize=3)
 
 print("Initial solution:")
@@ -102,23 +101,22 @@ print(ind1)
 print("Initial fitness: {}".format(helper.evaluate(initial_solution)))
 
 # Switch on multiprocessing. If you use call statistics in a profiler, switch of multiprocessing-
-pool = multiprocessing.Pool()
-toolbox.register("map", pool.map)
+# The workers evaluate individuals with their own copy of the problem. Every worker gets a contiguous
+# part of the population per generation.
+executor = ProcessPoolExecutor(initializer=_init_worker,
+                               initargs=(LAYOUT_FILE, INITIAL_STATE_FILE, DEPARTURES_FILE))
+toolbox.register("evaluate", _evaluate)
+toolbox.register("map", functools.partial(executor.map, chunksize=max(1, POPULATION_SIZE // os.cpu_count())))
 
 # Solve.
 pop = toolbox.population(n=POPULATION_SIZE)
-hof = tools.HallOfFame(1)
-stats = tools.Statistics(lambda ind: ind.fitness.values)
-stats.register("Avg", numpy.mean)
-stats.register("Std", numpy.std)
-stats.register("Min", numpy.min)
+hof = evo_simple.BestIndividual()
 T = len(initial_solution)
-stats.register("MinTotal", lambda x: numpy.min(x) * T)  # Minimal total costs and not average.
-stats.register("Max", numpy.max)
-helper.reset_counters()
+stats = evo_simple.FitnessStatistics(total_factor=T)  # MinTotal: minimal total costs and not average.
 pop, logbook = evo_simple.eaSimple(pop, toolbox, cxpb=0.5, mutpb=0.2, ngen=MAX_GENERATIONS,
                                    maxnoimprovments=MAX_NO_IMPROVEMENTS,
                                    stats=stats, halloffame=hof, verbose=True)
+executor.shutdown()
 
 if CSV_FILE is not None:
     with open(CSV_FILE, 'w+') as csvfile:
@@ -41,9 +41,9 @@ import logging
 import prp.core.warehouse
 import prp.utils as utils
 import prp.recorder as recorder
-import prp.xy as xy
 from prp.solvers.simple import FixedPlaceSolver
 import prp.solvers.optimal_fixed as optimal_fixed
+from _problem_cache import load_problem
 
 # Input files
 LAYOUT_FILE = "../data/10-layout.json"
@@ -57,23 +57,7 @@ OPTIMAL_SOLUTION_FILE = "../data/solutions/10-fixed-place-opt-solution.json"
 OPTIMAL_INITIAL_STATE_FILE = "../data/10-fixed-place-opt-initial-state.json"
 
 
-def load_problem():
-    """Load a test system with 10 places and 10 pods randomly distributed among them."""
-    layout = xy.Layout()
-    with open("../data/10-layout.json", 'r') as infile:
-        layout.load_from_json(infile)
-        warehouse = layout.get_empty_warehouse()
-        costs = layout.get_costs()
-        warehouse.set_costs(costs)
-    with open("../data/10-initial-state.json", 'r') as infile:
-        recorder.load_initial_state_from_json(infile, warehouse)
-    with open("../data/10-departures.json", 'r') as infile:
-        departures = recorder.load_departures_from_json(infile)
-        warehouse.set_departure_generator(departures)
-    return warehouse
-
-
-warehouse = load_problem()
+warehouse = load_problem(LAYOUT_FILE, INITIAL_STATE_FILE, DEPARTURES_FILE)
 
 print("Calculate exact fixed solution.")
 logging.basicConfig(level=logging.INFO)
@@ -96,7 +80,7 @@ with open(SOLUTION_FILE, 'w') as outfile:
     recorder.store_solution_to_json(solution, outfile)
 
 # Reload problem.
-warehouse = load_problem()
+warehouse = load_problem(LAYOUT_FILE, INITIAL_STATE_FILE, DEPARTURES_FILE)
 
 # Find optimal initial state.
 optimal_positions = optimal_fixed.optimal_assignment(warehouse)
@@ -29,6 +29,7 @@ and 1000 pod departures. The departures are from a paper.
 """
 
 import prp.recorder as recorder
+import prp.utils as utils
 import prp.xy as xy
 
 # Input files
@@ -36,16 +37,19 @@ LAYOUT_FILE = "../../data/10-layout.json"
 INITIAL_STATE_FILE = "../../data/10-initial-state.json"
 DEPARTURES_FILE = "../../data/paper/10-departures.json"
 
+# The loaded warehouse is pickled to this file, see prp.utils.load_cached_warehouse.
+CACHE_FILE = "../../data/paper/10-warehouse.pkl"
 
-def load():
-    """Load a test system with 10 places and 10 pods randomly distributed among them."""
+
+def _parse(layout_file, initial_state_file, departures_file):
+    """Load the test system from the JSON files."""
     layout = xy.Layout()
-    with open(LAYOUT_FILE, 'r') as infile:
+    with open(layout_file, 'r') as infile:
         layout.load_from_json(infile)
     warehouse = layout.get_empty_warehouse()
-    with open(INITIAL_STATE_FILE, 'r') as infile:
+    with open(initial_state_file, 'r') as infile:
         recorder.load_initial_state_from_json(infile, warehouse)
-    with open(DEPARTURES_FILE, 'r') as infile:
+    with open(departures_file, 'r') as infile:
         departures = recorder.load_departures_from_json(infile)
     warehouse.set_departure_generator(departures)
     costs = layout.get_costs()
@@ -53,6 +57,14 @@ def load():
     return warehouse
 
 
+def load():
+    """Load a test system with 10 places and 10 pods randomly distributed among them.
+
+    Every call returns a new warehouse.
+    """
+    return utils.load_cached_warehouse(CACHE_FILE, _parse, LAYOUT_FILE, INITIAL_STATE_FILE, DEPARTURES_FILE)
+
+
 def evaluate_solution(solution):
     """Evaluate solution of a small test system."""
     warehouse = load()
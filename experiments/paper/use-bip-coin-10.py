@@ -46,7 +46,7 @@ def get_cheapest_place_costs(warehouse):
     warehouse = prp.stats.copy_warehouse(warehouse)
     solver = CheapestPlaceSolver(warehouse, costs_type=CostsType.DECISION)
 
-    while not warehouse.finished():
+    for _ in range(warehouse.num_pending_departures()):
         place_id = solver.decide_new_place()
         warehouse.next(place_id)
 
@@ -37,11 +37,13 @@ import small_problem
 
 # Output file
 SOLUTION_FILE = "../../data/paper/solutions/10-bip-gurobi-solution.json"
+# Prefix of the cached BIP models. The file names contain a hash of the problem, changed problems get new files.
+MODEL_FILE = "../../data/paper/10-bip-gurobi"
 
 
 warehouse = small_problem.load()
 print("Running Gurobi BIP solver.")
-(solution, model) = bip.solve(warehouse)
+(solution, model) = bip.solve(warehouse, model_file=MODEL_FILE)
 
 # Save the results.
 utils.create_missing_directories_of_file(SOLUTION_FILE)
@@ -33,11 +33,11 @@ The test instance has 10 places, 10 pods, two stations with queue of the length
 import sys
 sys.path.append('../../')  # noqa: E402
 
-import copy
 import random  # For seed.
-import array
 import csv
-import multiprocessing
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy
 from deap import base
@@ -58,12 +58,26 @@ SOLUTION_FILE = "../../data/paper/solutions/10-genetic-of-solution.json"
 # Set it to None if you do not want to write data to a file.
 CSV_FILE = None
 
-# Use normal random instead of numpy.random.seed(7) to get reproducible results.
+# Crossover uses normal random, mutation uses numpy.random. Seed both to get reproducible results.
 random.seed(7)
+numpy.random.seed(7)
 POPULATION_SIZE = 100
 MAX_GENERATIONS = 100000
 MAX_NO_IMPROVEMENTS = 100
 
+# Evaluation helper of a worker process.
+_worker_helper = None
+
+
+def _init_worker(place_order):
+    """Load the problem once per worker process instead of sending it with every evaluation."""
+    global _worker_helper
+    _worker_helper = evo.Helper(small_problem.load(), place_order)
+
+
+def _evaluate(individual):
+    return _worker_helper.evaluate(individual)
+
 
 def get_place_ordered_by_avg_costs():
     warehouse = small_problem.load()
@@ -72,8 +86,6 @@ def get_place_ordered_by_avg_costs():
     return list(sorted(places, key=lambda x: avg_costs[x]))
 
 
-# Do not use numpy.ndarray. It is slower than list. Use array array with 4byte integer values.
-# 2 bytes are fast but it is too small to contain the large maximum value.
 #PLACE_ORDER = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
 PLACE_ORDER = get_place_ordered_by_avg_costs()
 print("Use place order: {}".format(PLACE_ORDER))
@@ -82,16 +94,17 @@ warehouse = small_problem.load()
 helper = evo.Helper(warehouse, PLACE_ORDER)
 
 creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
-creator.create("Individual", array.array, typecode="l", fitness=creator.FitnessMin)
+# Individuals are numpy arrays with 4 byte integer values. Crossover and mutation work then on whole slices and
+# masks. 2 bytes are too small to contain the large maximum value.
+creator.create("Individual", numpy.ndarray, fitness=creator.FitnessMin)
 toolbox = base.Toolbox()
-initial_solution = helper.cheapest_place_solution(CostsType.DECISION)
-toolbox.register("initialSolution", copy.deepcopy, initial_solution)
+initial_solution = numpy.array(helper.cheapest_place_solution(CostsType.DECISION), dtype=numpy.int32)
+toolbox.register("initialSolution", initial_solution.copy)
 toolbox.register("individual", tools.initIterate, creator.Individual, toolbox.initialSolution)
 toolbox.register("population", tools.initRepeat, list, toolbox.individual)
-toolbox.register("mate", tools.cxTwoPoint)
-toolbox.register("mutate", tools.mutUniformInt, low=helper.min_action(),
+toolbox.register("mate", evo_simple.cx_two_point_np)
+toolbox.register("mutate", evo_simple.mut_uniform_int_np, low=helper.min_action(),
                  up=helper.max_action(), indpb=3.0 / len(initial_solution))
-toolbox.register("evaluate", helper.evaluate)
 toolbox.register("select", tools.selTournament, tournsize=3)
 
 print("Initial solution:")
@@ -99,13 +112,16 @@ ind1 = toolbox.individual()
 print(ind1)
 print("Initial fitness: {}".format(helper.evaluate(initial_solution)))
 
-# Swich on multiprocessing.
-pool = multiprocessing.Pool()
-toolbox.register("map", pool.map)
+# Switch on multiprocessing. The workers evaluate individuals with their own copy of the problem. Every worker gets
+# a contiguous part of the population per generation.
+executor = ProcessPoolExecutor(initializer=_init_worker, initargs=(PLACE_ORDER,))
+toolbox.register("evaluate", _evaluate)
+toolbox.register("map", functools.partial(executor.map, chunksize=max(1, POPULATION_SIZE // os.cpu_count())))
 
 # Solve.
 pop = toolbox.population(n=POPULATION_SIZE)
-hof = tools.HallOfFame(1)
+# Numpy arrays cannot be compared with ==.
+hof = tools.HallOfFame(1, similar=numpy.array_equal)
 stats = tools.Statistics(lambda ind: ind.fitness.values)
 stats.register("Avg", numpy.mean)
 stats.register("Std", numpy.std)
@@ -116,6 +132,7 @@ stats.register("Max", numpy.max)
 pop, logbook = evo_simple.eaSimple(pop, toolbox, cxpb=0.5, mutpb=0.2, ngen=MAX_GENERATIONS,
                                    maxnoimprovments=MAX_NO_IMPROVEMENTS,
                                    stats=stats, halloffame=hof, verbose=True)
+executor.shutdown()
 
 if CSV_FILE is not None:
     with open(CSV_FILE, 'w+') as csvfile:
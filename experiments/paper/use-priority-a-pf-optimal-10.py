@@ -58,7 +58,7 @@ else:
 
 solution = []
 
-while not warehouse.finished():
+for _ in range(warehouse.num_pending_departures()):
     place_id = solver.decide_new_place()
     solution.append(place_id)
     warehouse.next(place_id)
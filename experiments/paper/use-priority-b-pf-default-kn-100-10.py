@@ -56,7 +56,7 @@ known_departures = priority_b.KnownData(warehouse.departure_generator, warehouse
 
 solution = []
 
-while not warehouse.finished():
+for _ in range(warehouse.num_pending_departures()):
     known_departures.update_data(warehouse, KNOWN)
     solver.update_departures(known_departures.departures_by_station)
     place_id = solver.decide_new_place()
@@ -54,7 +54,7 @@ solver = RandomSolver(warehouse)
 # Run the system until no departure left. Store solution.
 solution = []
 
-while not warehouse.finished():
+for _ in range(warehouse.num_pending_departures()):
     place_id = solver.decide_new_place()
     solution.append(place_id)
     warehouse.next(place_id)
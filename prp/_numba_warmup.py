@@ -0,0 +1,55 @@
+# Pod Repositioning Problem
+# Copyright (C) 2017, 2018 Arbeitsgruppe OR an der Leuphana Universität Lüneburg
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Compile the kernels of :mod:`prp.kernels` on import.
+
+Every kernel is called once with tiny inputs of the same types as the real calls. The first run writes the
+compiled kernels to the numba cache, later runs only load them.
+"""
+import numpy
+import prp.kernels as kernels
+
+
+def warm_up():
+    """Call every kernel once."""
+    pod_location = numpy.array([0, 1, 2], dtype=numpy.int16)
+    current_cfg = numpy.array([0, 1, 2], dtype=numpy.int16)
+    orig_cfg = numpy.zeros((2, 3), dtype=numpy.int16)
+    from_station_mat = numpy.zeros((2, 3), dtype=numpy.int32)
+    to_station_mat = numpy.zeros((3, 2), dtype=numpy.int32)
+    kernels.store_step(0, 1, 2, numpy.int16(1), 1, pod_location, current_cfg, orig_cfg,
+                       from_station_mat, to_station_mat, 2)
+
+    # Two places, one pod and one station with one place.
+    place_to_pod = numpy.array([0, 1, 0], dtype=numpy.int32)
+    pod_to_place = numpy.array([0, 1], dtype=numpy.int32)
+    queues = numpy.zeros((2, 1), dtype=numpy.int32)
+    queue_lengths = numpy.zeros(2, dtype=numpy.int32)
+    max_n = numpy.array([0, 1], dtype=numpy.int32)
+    departures = numpy.array([[1, 1]], dtype=numpy.int32)
+    decisions = numpy.zeros(1, dtype=numpy.int32)
+    kernels.simulate_cheapest_place(place_to_pod, pod_to_place, queues, queue_lengths, max_n, departures,
+                                    numpy.zeros((2, 3)), numpy.zeros((3, 2)), decisions, 0)
+    kernels.replay(place_to_pod.copy(), pod_to_place.copy(), queues.copy(), queue_lengths.copy(), max_n,
+                   departures.astype(numpy.int64), numpy.zeros((2, 3)), numpy.zeros((3, 2)),
+                   numpy.zeros(1, dtype=numpy.int64), 0.0)
+    kernels.evaluate_ordered(numpy.zeros(1, dtype=numpy.int64), numpy.array([1, 2], dtype=numpy.int32),
+                             place_to_pod, pod_to_place, queues, queue_lengths, max_n, departures,
+                             numpy.zeros((2, 3)), numpy.zeros((3, 2)))
+
+    kernels.sample_pod(numpy.array([0.0, 1.0]), numpy.array([1], dtype=numpy.int64), 0.0)
+
+
+warm_up()
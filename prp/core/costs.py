@@ -19,11 +19,19 @@
 
 .. moduleauthor:: Ruslan Krenzler
 """
+import numpy
 from prp.core.objects import INVALID_ID
 
 
 class Costs:
-    """Calculate different costs of a system."""
+    """Calculate different costs of a system.
+
+    If :attr:`is_constant` is true, all from-station costs are equal to the attribute ``from_const`` and all
+    to-station costs are equal to ``to_const``. Loops over many costs can check it once and skip the calls.
+    """
+
+    __slots__ = ()
+    is_constant = False
 
     @property
     def station_ids(self):
@@ -50,6 +58,11 @@ class ZeroCosts(Costs):
     We use it for test purposes. Of for calculations where costs are not important.
     """
 
+    __slots__ = ()
+    is_constant = True
+    from_const = 0
+    to_const = 0
+
     def from_station(self, station_id: int, place_id: int):
         return 0
 
@@ -63,6 +76,9 @@ class ConstantCosts(Costs):
     We use it for test purposes.
     """
 
+    __slots__ = ("_station_ids", "_place_ids", "from_const", "to_const")
+    is_constant = True
+
     def __init__(self, station_ids, place_ids, from_station: float, to_station: float = None) -> float:
         """Set up constant costs.
 
@@ -73,11 +89,11 @@ class ConstantCosts(Costs):
         """
         self._station_ids = station_ids
         self._place_ids = place_ids
-        self._from_station = from_station
+        self.from_const = from_station
         if to_station is None:
-            self._to_station = from_station
+            self.to_const = from_station
         else:
-            self._to_station = to_station
+            self.to_const = to_station
 
     @property
     def station_ids(self):
@@ -88,42 +104,56 @@ class ConstantCosts(Costs):
         return self._place_ids
 
     def from_station(self, station_id: int, place_id: int):
-        return self._from_station
+        return self.from_const
 
     def to_station(self, place_id, station_id):
-        return self._to_station
+        return self.to_const
 
 
 class DictCosts(Costs):
-    """Store costs as dictionaries."""
+    """Store costs as dense arrays which are indexed by IDs.
+
+    The name is historical, the costs were stored as dictionaries of dictionaries once. The arrays have the layout
+    of :func:`get_cost_matrices`, row and column 0 belong to :attr:`INVALID_ID`. Costs which were not set are 0,
+    fill all of them before using the costs.
+
+    The arrays can be larger than the number of stations and places, then set_num_stations and set_num_places
+    do not allocate new arrays.
+    """
+
+    __slots__ = ("num_stations", "num_places", "_from_buffer", "_to_buffer")
 
-    def __init__(self, other_costs: Costs = None):
+    def __init__(self, other_costs: Costs = None, capacity: tuple = None):
+        """Copy other costs or create empty costs.
+
+        :param other_costs: costs to copy.
+        :param capacity: tuple (number of stations, number of places) to allocate the arrays for, when the costs
+            are set with set_num_stations, set_num_places and the setters later.
+        """
         if other_costs is None:
             self.num_stations = 0
             self.num_places = 0
-            self.to_station_dict = {}
-            self.from_station_dict = {}
+            (max_stations, max_places) = (0, 0) if capacity is None else capacity
+            self._from_buffer = numpy.zeros((max_stations + 1, max_places + 1), dtype=numpy.float64)
+            self._to_buffer = numpy.zeros((max_places + 1, max_stations + 1), dtype=numpy.float64)
         else:
             self.num_stations = len(other_costs.station_ids)
             self.num_places = len(other_costs.place_ids)
-            self.to_station_dict = self._create_to_station_mapping(other_costs)
-            self.from_station_dict = self._create_from_station_mapping(other_costs)
+            self._from_buffer = self._create_from_station_mapping(other_costs)
+            self._to_buffer = self._create_to_station_mapping(other_costs)
 
     @staticmethod
     def _create_from_station_mapping(costs):
-        """Create a mapping function from a place to a station.
+        """Create a mapping function from a station to a place.
 
         It is a Station x Place --> R mapping.
         """
-
-        # Init return value.
-        mapping = {}
-
+        place_ids = list(costs.place_ids)
+        mapping = numpy.zeros((len(costs.station_ids) + 1, len(place_ids) + 1), dtype=numpy.float64)
         for station_id in costs.station_ids:
-            station_costs = {}  # costs from station_id to other places
-            for place_id in costs.place_ids:
-                station_costs[place_id] = costs.from_station(station_id, place_id)
-            mapping[station_id] = station_costs
+            mapping[station_id, place_ids] = numpy.fromiter(
+                (costs.from_station(station_id, place_id) for place_id in place_ids),
+                dtype=numpy.float64, count=len(place_ids))
         return mapping
 
     @staticmethod
@@ -132,16 +162,12 @@ class DictCosts(Costs):
 
         It is a Place x Station --> R mapping.
         """
-
-        # Init return value.
-        mapping = {}
-
+        station_ids = list(costs.station_ids)
+        mapping = numpy.zeros((len(costs.place_ids) + 1, len(station_ids) + 1), dtype=numpy.float64)
         for place_id in costs.place_ids:
-            place_costs = {}  # costs for place_id to different stations
-            for station_id in costs.station_ids:
-                place_costs[station_id] = costs.to_station(place_id, station_id)
-            mapping[place_id] = place_costs
-
+            mapping[place_id, station_ids] = numpy.fromiter(
+                (costs.to_station(place_id, station_id) for station_id in station_ids),
+                dtype=numpy.float64, count=len(station_ids))
         return mapping
 
     @property
@@ -152,26 +178,77 @@ class DictCosts(Costs):
     def place_ids(self):
         return range(1, self.num_places + 1)
 
+    @property
+    def _from(self):
+        """Return from-station costs of the current stations and places as an array view."""
+        return self._from_buffer[:self.num_stations + 1, :self.num_places + 1]
+
+    @property
+    def _to(self):
+        """Return to-station costs of the current places and stations as an array view."""
+        return self._to_buffer[:self.num_places + 1, :self.num_stations + 1]
+
+    @property
+    def from_station_dict(self):
+        """Return from-station costs as a dictionary station_id -> (place_id -> costs)."""
+        place_ids = self.place_ids
+        rows = self._from_buffer[1:self.num_stations + 1, 1:self.num_places + 1].tolist()
+        return {station_id: dict(zip(place_ids, row)) for (station_id, row) in zip(self.station_ids, rows)}
+
+    @property
+    def to_station_dict(self):
+        """Return to-station costs as a dictionary place_id -> (station_id -> costs)."""
+        station_ids = self.station_ids
+        rows = self._to_buffer[1:self.num_places + 1, 1:self.num_stations + 1].tolist()
+        return {place_id: dict(zip(station_ids, row)) for (place_id, row) in zip(self.place_ids, rows)}
+
     def from_station(self, station_id: int, place_id: int):
-        return self.from_station_dict[station_id][place_id]
+        return self._from_buffer[station_id, place_id]
 
     def to_station(self, place_id, station_id):
-        return self.to_station_dict[place_id][station_id]
+        return self._to_buffer[place_id, station_id]
+
+    def from_station_row(self, station_id: int) -> numpy.ndarray:
+        """Return costs from a station to all places, indexed by place_id.
+
+        The returned array is a view, do not change it.
+        """
+        return self._from_buffer[station_id, :self.num_places + 1]
+
+    def to_station_col(self, station_id: int) -> numpy.ndarray:
+        """Return costs from all places to a station, indexed by place_id.
+
+        The returned array is a view, do not change it.
+        """
+        return self._to_buffer[:self.num_places + 1, station_id]
+
+    def _reserve(self, num_stations: int, num_places: int):
+        """Make sure that the arrays have space for the stations and places.
+
+        Grow the arrays at least by the factor 2 to make repeated growing cheap.
+        """
+        (rows, cols) = self._from_buffer.shape
+        if num_stations < rows and num_places < cols:
+            return
+        if num_stations >= rows:
+            rows = max(num_stations + 1, 2 * rows)
+        if num_places >= cols:
+            cols = max(num_places + 1, 2 * cols)
+        from_buffer = numpy.zeros((rows, cols), dtype=numpy.float64)
+        to_buffer = numpy.zeros((cols, rows), dtype=numpy.float64)
+        from_buffer[:self.num_stations + 1, :self.num_places + 1] = self._from
+        to_buffer[:self.num_places + 1, :self.num_stations + 1] = self._to
+        (self._from_buffer, self._to_buffer) = (from_buffer, to_buffer)
 
     def set_num_stations(self, n: int):
         """Set number of stations in the costs functions.
 
         Call this function before setting the costs.
         """
-        # Add missing stations to to_station function
-        # if n is larger than current number of stations.
-        for station_id in range(self.num_stations + 1, n + 1):
-            self.from_station_dict[station_id] = {}
-
-        # Remove too large station_id if N is smaller than the previous N
-        for station_id in range(n + 1, self.num_stations + 1):
-            del self.to_station_dict[station_id]
-
+        self._reserve(n, self.num_places)
+        # Removed stations have no costs if they are added again.
+        self._from_buffer[n + 1:, :] = 0
+        self._to_buffer[:, n + 1:] = 0
         self.num_stations = n
 
     def set_num_places(self, n: int):
@@ -179,22 +256,110 @@ class DictCosts(Costs):
 
         Call this function before setting the costs.
         """
-        # Add missing places to to_station function
-        # if n is larger than current number of places.
-        for place_id in range(self.num_places + 1, n + 1):
-            self.to_station_dict[place_id] = {}
-
-        # Remove too large point_id if N is smaller than the previous N
-        for place_id in range(n + 1, self.num_places + 1):
-            del self.to_station_dict[place_id]
-
+        self._reserve(self.num_stations, n)
+        # Removed places have no costs if they are added again.
+        self._from_buffer[:, n + 1:] = 0
+        self._to_buffer[n + 1:, :] = 0
         self.num_places = n
 
     def set_from_station(self, station_id: int, place_id: int, costs: float):
-        self.from_station_dict[station_id][place_id] = costs
+        self._from_buffer[station_id, place_id] = costs
 
     def set_to_station(self, place_id, station_id, costs: float):
-        self.to_station_dict[place_id][station_id] = costs
+        self._to_buffer[place_id, station_id] = costs
+
+    def set_from_station_dict(self, from_station: dict):
+        """Set from-station costs from a dictionary station_id -> (place_id -> costs).
+
+        The IDs may also be strings like in JSON files. Set the number of stations and places before.
+        """
+        for (station_id, places) in from_station.items():
+            place_ids = numpy.fromiter(map(int, places.keys()), dtype=numpy.intp, count=len(places))
+            self._from_buffer[int(station_id), place_ids] = numpy.fromiter(places.values(), dtype=numpy.float64,
+                                                                           count=len(places))
+
+    def set_to_station_dict(self, to_station: dict):
+        """Set to-station costs from a dictionary place_id -> (station_id -> costs).
+
+        The IDs may also be strings like in JSON files. Set the number of stations and places before.
+        """
+        for (place_id, stations) in to_station.items():
+            station_ids = numpy.fromiter(map(int, stations.keys()), dtype=numpy.intp, count=len(stations))
+            self._to_buffer[int(place_id), station_ids] = numpy.fromiter(stations.values(), dtype=numpy.float64,
+                                                                         count=len(stations))
+
+
+def get_cost_matrices(costs: Costs, dtype=numpy.float64, station_ids=None, place_ids=None):
+    """Return costs as dense matrices (from_station, to_station).
+
+    It holds from_station[station_id, place_id] = costs.from_station(station_id, place_id) and
+    to_station[place_id, station_id] = costs.to_station(place_id, station_id). The row and the column 0 belong to
+    :attr:`INVALID_ID` and contain zeros, that way the IDs can be used as indices directly.
+
+    :param station_ids: stations of the matrices. Default are the station_ids of the costs. Pass the stations of the
+        warehouse for costs without a domain, like the costs of :mod:`prp.core.objects`.
+    :param place_ids: places of the matrices. Default are the place_ids of the costs.
+    """
+    if isinstance(costs, DictCosts):
+        return costs._from.astype(dtype), costs._to.astype(dtype)
+    station_ids = list(costs.station_ids if station_ids is None else station_ids)
+    place_ids = list(costs.place_ids if place_ids is None else place_ids)
+    from_station = numpy.zeros((max(station_ids) + 1, max(place_ids) + 1), dtype=dtype)
+    to_station = numpy.zeros((max(place_ids) + 1, max(station_ids) + 1), dtype=dtype)
+    if getattr(costs, "is_constant", False):
+        from_station[numpy.ix_(station_ids, place_ids)] = costs.from_const
+        to_station[numpy.ix_(place_ids, station_ids)] = costs.to_const
+        return from_station, to_station
+    for station_id in station_ids:
+        for place_id in place_ids:
+            from_station[station_id, place_id] = costs.from_station(station_id, place_id)
+            to_station[place_id, station_id] = costs.to_station(place_id, station_id)
+    return from_station, to_station
+
+
+def max_costs(costs: Costs, station_ids, place_ids):
+    """Return the maximal costs (from-station, to-station) of the stations and places, but at least 0.
+
+    Constant costs are not evaluated for every pair, see :attr:`Costs.is_constant`. The costs of
+    :mod:`prp.core.objects` do not have this attribute, they are always evaluated.
+    """
+    max_from_station = 0.0
+    max_to_station = 0.0
+    if getattr(costs, "is_constant", False):
+        return max(max_from_station, costs.from_const), max(max_to_station, costs.to_const)
+    for station_id in station_ids:
+        for place_id in place_ids:
+            max_from_station = max(max_from_station, costs.from_station(station_id, place_id))
+            max_to_station = max(max_to_station, costs.to_station(place_id, station_id))
+    return max_from_station, max_to_station
+
+
+class MatrixCosts(Costs):
+    """Store costs as matrices which are indexed by IDs.
+
+    The matrices have the layout of :func:`get_cost_matrices`. They can also be read-only memory maps,
+    see :func:`prp.recorder.load_costs_from_npy`.
+    """
+
+    __slots__ = ("from_station_matrix", "to_station_matrix")
+
+    def __init__(self, from_station, to_station):
+        self.from_station_matrix = from_station
+        self.to_station_matrix = to_station
+
+    @property
+    def station_ids(self):
+        return range(1, self.from_station_matrix.shape[0])
+
+    @property
+    def place_ids(self):
+        return range(1, self.from_station_matrix.shape[1])
+
+    def from_station(self, station_id: int, place_id: int):
+        return self.from_station_matrix[station_id, place_id]
+
+    def to_station(self, place_id, station_id):
+        return self.to_station_matrix[place_id, station_id]
 
 
 class AverageCosts(DictCosts):
@@ -214,29 +379,33 @@ class AverageCosts(DictCosts):
             self.average_mapping = None
             self.estimated_mapping = None
 
+    def _get_weight_vector(self):
+        """Return station weights as a vector which is indexed by station_id."""
+        w = numpy.zeros(self._from.shape[0], dtype=numpy.float64)
+        for (station_id, weight) in self.station_weights.items():
+            w[station_id] = weight
+        return w
+
     def _create_average_mapping(self):
-        mapping = {}
-        for place_id in self.place_ids:
-            c = 0
-            for (station_id, w) in self.station_weights.items():
-                c += w * (self.from_station_dict[station_id][place_id] + self.to_station_dict[place_id][station_id])
-            mapping[place_id] = c
-        return mapping
+        """Return average costs of the places as a vector which is indexed by place_id."""
+        w = self._get_weight_vector()
+        return w @ self._from + self._to @ w
 
     def _create_estimated_mapping(self):
-        mapping = {}
-        for from_station_id in self.station_ids:
-            mapping[from_station_id] = {}
-            for place_id in self.place_ids:
-                c = self.from_station_dict[from_station_id][place_id]
-                for (to_station_id, w) in self.station_weights.items():
-                    c += w * self.to_station_dict[place_id][to_station_id]
-                mapping[from_station_id][place_id] = c
-        return mapping
+        """Return estimated costs as a matrix which is indexed by [from_station_id, place_id]."""
+        w = self._get_weight_vector()
+        return self._from + (self._to @ w)[numpy.newaxis, :]
 
     def deterministic(self, from_station_id, place_id, to_station_id):
-        c = self._from_station[from_station_id][place_id]
+        c = self._from_buffer[from_station_id, place_id]
         if to_station_id != INVALID_ID:
-            c += self._to_station[place_id][to_station_id]
+            c += self._to_buffer[place_id, to_station_id]
 
         return c
+
+    def deterministic_batch(self, from_station_ids, place_ids, to_station_ids):
+        """Return :meth:`deterministic` for arrays of IDs.
+
+        No mask is needed for :attr:`INVALID_ID` to-stations, because their costs are zero.
+        """
+        return self._from_buffer[from_station_ids, place_ids] + self._to_buffer[place_ids, to_station_ids]
@@ -21,11 +21,11 @@
 
 
 """
-import copy
 import numpy
 import logging
 import math
-from prp.core.warehouse import DepartureGenerator, Warehouse
+import prp.kernels as kernels
+from prp.core.warehouse import DepartureGenerator, StorageObserver, Warehouse
 from prp.core.objects import INVALID_ID
 
 
@@ -33,42 +33,102 @@ def seed(seed):
     numpy.random.seed(seed)
 
 
+def _get_station_distribution(warehouse: Warehouse, station_weights: dict):
+    """Return station IDs and their probabilities as arrays for numpy.random.choice.
+
+    The stations and the weights do not change during the lifetime of a generator, that is why the generators
+    create the arrays only once.
+    """
+    station_ids = numpy.fromiter(warehouse.stations.keys(), dtype=numpy.int64, count=len(warehouse.stations))
+    probabilities = numpy.fromiter((station_weights[station_id] for station_id in station_ids),
+                                   dtype=numpy.float64, count=len(station_ids))
+    return station_ids, probabilities
+
+
+def _get_cdf(probabilities):
+    """Return the normalized cumulative probabilities, like numpy.random.choice.
+
+    A random number u from [0, 1) selects the index numpy.searchsorted(cdf, u, side='right').
+    """
+    cdf = numpy.cumsum(probabilities)
+    cdf /= cdf[-1]
+    return cdf
+
+
 class DeterministicDepartures(DepartureGenerator):
-    """Generate departures according to a departure lists."""
+    """Generate departures according to a departure lists.
+
+    The departures are stored in an array with one row (pod_id, station_id) per departure. The generator only moves
+    the index of the current departure, the array is never changed. The current departure is kept as a tuple, because
+    the warehouse and the solvers ask for it several times per step.
+    """
+
+    __slots__ = ("_departures", "_i", "_current")
 
     def __init__(self, departures):
         if type(departures) is DeterministicDepartures:
-            self.departures = copy.deepcopy(departures.departures)
+            # Share the array, it is read only.
+            self._departures = departures.departures
+        else:
+            self._departures = numpy.array(departures, dtype=numpy.int64).reshape(-1, 2)
+        self._set_index(0)
+
+    def _set_index(self, i):
+        self._i = i
+        if i < len(self._departures):
+            self._current = tuple(self._departures[i].tolist())
         else:
-            self.departures = departures
+            self._current = None
+
+    @property
+    def departures(self):
+        """Return the remaining departures including the current one as an array with rows (pod_id, station_id)."""
+        return self._departures[self._i:]
 
     def get_all_departures(self):
-        """Return a list of all departures as a list of tupples (time, pod_id, station_id)."""
+        """Return the remaining departures as an array with rows (pod_id, station_id)."""
         return self.departures
 
     def next(self):
-        if len(self.departures) > 0:
-            self.departures.pop(0)
+        if self._i < len(self._departures):
+            self._set_index(self._i + 1)
 
     def current(self):
-        return self.departures[0]
+        if self._current is None:
+            raise IndexError("There are no departures left.")
+        return self._current
 
     def __len__(self):
-        return len(self.departures)
+        return len(self._departures) - self._i
 
     def is_finite(self):
         return True
 
+    def snapshot(self):
+        """Return the index of the current departure."""
+        return self._i
+
+    def restore(self, state):
+        """Continue with the departures returned by :meth:`snapshot`."""
+        self._set_index(state)
 
-class MarkovianGenerator(DepartureGenerator):
+
+class MarkovianGenerator(DepartureGenerator, StorageObserver):
     """Generate departures according to Markovian description of the problem."""
 
+    __slots__ = ("warehouse", "pod_weights", "station_weights", "verbose", "departures_remains", "current_departure",
+                 "_station_ids", "_station_probabilities", "_station_cdf", "batch_size", "_uniform",
+                 "_pod_random_numbers", "_next_stations", "_batch_i", "_pod_weights", "_pods_in_storage")
+
     def __init__(self, warehouse: Warehouse,
-                 w_pods: dict, w_station: dict, n=float("-inf")):
+                 w_pods: dict, w_station: dict, n=float("-inf"), batch_size=1):
         """Init departure generator with geometricly distributed weights.
 
         :param p: the weights are then w[i+1] = w[i]*(1-self.p).
         :param n: is maximal number of generated departures.
+        :param batch_size: number of departures for which the random numbers are drawn at once. Every departure
+            uses the same random numbers for every batch size, as long as nobody else draws random numbers from
+            numpy.random between the departures. Otherwise use the default 1.
         """
         self.warehouse = warehouse
         self.pod_weights = w_pods
@@ -76,41 +136,91 @@ class MarkovianGenerator(DepartureGenerator):
         self.verbose = False
         self.departures_remains = n
         self.current_departure = None
+        (self._station_ids, self._station_probabilities) = _get_station_distribution(warehouse, w_station)
+        self._station_cdf = _get_cdf(self._station_probabilities)
+        self.batch_size = batch_size
+        # All pods have the same weight, see UniformGenerator.
+        self._uniform = False
+        # Random numbers for the pods and the stations of the next departures.
+        self._pod_random_numbers = numpy.empty(0)
+        self._next_stations = numpy.empty(0, dtype=numpy.int64)
+        self._batch_i = 0
+        # Pod weights indexed by pod_id.
+        self._pod_weights = numpy.zeros(max(w_pods.keys()) + 1, dtype=numpy.float64)
+        for (pod_id, w) in w_pods.items():
+            self._pod_weights[pod_id] = w
+        # Sorted pods in the storage area. The warehouse tells us when they change.
+        self._pods_in_storage = self._scan_storage()
+        warehouse.add_storage_observer(self)
 
     def next(self):
         self.current_departure = self._generate()
         self.departures_remains -= 1
         return self.current_departure
 
+    def _scan_storage(self):
+        """Return sorted array of the pods in the storage area of the warehouse."""
+        return numpy.array(sorted(pod_id for pod_id in self.warehouse.place_to_pod.values() if pod_id != INVALID_ID),
+                           dtype=numpy.int64)
+
+    def on_pod_enters_storage(self, pod_id):
+        i = numpy.searchsorted(self._pods_in_storage, pod_id)
+        self._pods_in_storage = numpy.insert(self._pods_in_storage, i, pod_id)
+
+    def on_pod_leaves_storage(self, pod_id):
+        i = numpy.searchsorted(self._pods_in_storage, pod_id)
+        self._pods_in_storage = numpy.delete(self._pods_in_storage, i)
+
+    def on_storage_reset(self):
+        self._pods_in_storage = self._scan_storage()
+
     def _get_departure_candidates(self):
-        """Return sorted list of pods which may departure.
+        """Return sorted array of pods which may departure.
 
         The old implementation did not sort this list, that is why the pseudo randomly generated departures
         depended on the solver. To prevent this problem and to make the pseudo random departures independent from the
         solver, we sort the list of pods.
         """
-        pods = []
-        for (place_id, pod_id) in self.warehouse.place_to_pod.items():
-            if pod_id is not INVALID_ID:
-                pods.append(pod_id)
-        return sorted(pods)
+        return self._pods_in_storage
+
+    def _refill(self):
+        """Draw the random numbers of the next batch_size departures.
+
+        The stations do not depend on the warehouse, they are selected for the whole batch. The pods depend on the
+        pods in the storage area, they are selected one by one in :meth:`_generate`.
+        """
+        random_numbers = numpy.random.random_sample((self.batch_size, 2))
+        self._pod_random_numbers = random_numbers[:, 0].copy()
+        self._next_stations = self._station_ids[numpy.searchsorted(self._station_cdf, random_numbers[:, 1],
+                                                                   side='right')]
+        self._batch_i = 0
 
     def _generate(self):
         """Generate new departure."""
+        if self._batch_i == len(self._next_stations):
+            self._refill()
+        pods = self._get_departure_candidates()
+        u = self._pod_random_numbers[self._batch_i]
+        if self._uniform:
+            pod_id = pods[min(int(u * len(pods)), len(pods) - 1)]
+        else:
+            # The kernel and the station CDF use the same random numbers as numpy.random.choice in _generate_slow.
+            pod_id = kernels.sample_pod(self._pod_weights, pods, u)
+        station_id = self._next_stations[self._batch_i]
+        self._batch_i += 1
+        if self.verbose:
+            logging.debug("Selected pod {} for station {} at time {}+1".format(pod_id, station_id, self.warehouse.t))
+        # Convert pod_id and station_id to int. Otherwise there could
+        # be later problems to store int64 with json.
+        return int(pod_id), int(station_id)
+
+    def _generate_slow(self):
+        """Generate new departure without the compiled kernel."""
         # Check what ids are available in the storage area.
         # Available -- means here that the pod is in the storage area
         # and not at a station.
-        pods = self._get_departure_candidates()
-        weights = []  # Probability weights of the pods to departure.
-        total_w = 0.0
-
         pods = self._get_departure_candidates()
 
-        for pod_id in pods:
-            w = self.pod_weights[pod_id]
-            weights.append(w)
-            total_w += w
-
         # Print some debug infomration.
         if self.verbose:
             s = "Available pods:"
@@ -118,16 +228,15 @@ class MarkovianGenerator(DepartureGenerator):
                 s = s + " " + str(id) + ", "
 
         # Normalize weights.
-        for i in range(0, len(weights)):
-            weights[i] /= total_w
+        weights = self._pod_weights[pods]
+        weights /= weights.sum()
 
         pod_id = numpy.random.choice(pods, None, True, weights)
         if self.verbose:
             s = s + " selected {}.".format(pod_id)
 
         # randomly select a station.
-        station_id = numpy.random.choice(list(self.warehouse.stations.keys()), None,
-                                         True, list(self.station_weights.values()))
+        station_id = numpy.random.choice(self._station_ids, None, True, self._station_probabilities)
         if self.verbose:
             s = s + " for station {}.".format(station_id)
             s = s + " at time {}+1".format(self.warehouse.t)
@@ -155,13 +264,11 @@ def get_geometric_weights(npods, max_weight_ratio):
     :param npods: Number of pods in the warehouse.
     :param max_weight_ratio: (maximal weight)/(minimal weight).
     """
-    w = {}
+    pods = range(1, npods + 1)
     # If max_weight_ratio is 1 then we have a limmiting case geometric->unfirom.
     # To prevent problems (device by zero) in subsequent formulas, return uniform distribution directly.
     if max_weight_ratio == 1:
-        for pod in range(1, npods + 1):
-            w[pod] = 1/npods
-        return w
+        return dict.fromkeys(pods, 1/npods)
 
     # Calculate parameter q in such a way that the very rare pod will be max_weight_ratio less frequent as
     # the first one. It holds
@@ -169,16 +276,16 @@ def get_geometric_weights(npods, max_weight_ratio):
     # P(ID=h)= q^(h-1)*(1-q)/(1-q^NPODS)
     q = max_weight_ratio**(-1 / (npods - 1))  # Not normalized weight of the pod 1.
     w1 = (1 - q) / (1 - q**npods)  # Normalization constant.
+    w = w1 * numpy.power(q, numpy.arange(npods, dtype=numpy.float64))
 
-    for pod in range(1, npods + 1):
-        w[pod] = w1 * q**(pod - 1)
-
-    return w
+    return dict(zip(pods, w.tolist()))
 
 
 class UniformGenerator(MarkovianGenerator):
     """Select a pod for the next departure with equal probability."""
 
+    __slots__ = ()
+
     def __init__(self, station_weights, warehouse: Warehouse, n=float("-inf")):
         """Init departure generator with geometricly distributed weights.
 
@@ -186,13 +293,13 @@ class UniformGenerator(MarkovianGenerator):
         :param n: is maximal number of generated departures.
         """
         pod_weights = self.create_weights(warehouse)
-        super(UniformGenerator, self).__init__(pod_weights, station_weights, warehouse, n=n)
+        super(UniformGenerator, self).__init__(warehouse, pod_weights, station_weights, n=n)
+        # Select pods without their weights.
+        self._uniform = True
 
     @classmethod
     def create_weights(cls, warehouse):
-        n = len(warehouse.place_to_pod)
-        weights = dict(zip(warehouse.place_to_pod.keys(), n * [1 / n]))
-        return weights
+        return dict.fromkeys(warehouse.pods, 1 / warehouse.num_pods)
 
 
 class CyclicGenerator(DepartureGenerator):
@@ -201,23 +308,35 @@ class CyclicGenerator(DepartureGenerator):
     The stations are selected independent randomly according to their weights.
     """
 
+    __slots__ = ("warehouse", "station_weights", "verbose", "departures_remain", "current_departure", "pods",
+                 "random_shuffle", "_shuffled", "_cycle", "current_pod_i", "repeat", "_station_ids", "_station_cdf")
+
     def __init__(self, station_weights, warehouse: Warehouse, n=float("-inf")):
         self.warehouse = warehouse
         self.station_weights = station_weights
         self.verbose = False
         self.departures_remain = n
         self.current_departure = None
-        self.current_pod_i = 0
-        self.pods = list(sorted(warehouse.pods))
+        self.pods = numpy.array(sorted(warehouse.pods), dtype=numpy.int64)
         self.random_shuffle = False
-        self.remaining_pods = []
+        self._shuffled = numpy.empty_like(self.pods)
+        # Pods of the current cycle and the index of the next pod in the cycle.
+        self._cycle = numpy.empty(0, dtype=numpy.int64)
+        self.current_pod_i = 0
         self.repeat = []
+        (self._station_ids, station_probabilities) = _get_station_distribution(warehouse, station_weights)
+        self._station_cdf = _get_cdf(station_probabilities)
 
     def _get_pod_list(self):
+        """Return the pods of a new cycle as an array. Do not change it."""
         if self.random_shuffle:
-            return list(numpy.random.choice(self.warehouse.pods, len(self.warehouse.pods), replace=False))
+            # Shuffle the sorted pods in a reused buffer. The previous cycle in the buffer is finished. It is the
+            # same permutation as numpy.random.choice(pods, len(pods), replace=False).
+            self._shuffled[:] = self.pods
+            numpy.random.shuffle(self._shuffled)
+            return self._shuffled
         else:
-            return copy.copy(self.pods)
+            return self.pods
 
     def next(self):
         self.current_departure = self._generate()
@@ -240,9 +359,11 @@ class CyclicGenerator(DepartureGenerator):
                 break
         # If no pod were selected from repeat list. Select a pod.
         while pod_id is None:
-            if not self.remaining_pods:
-                self.remaining_pods = self._get_pod_list()
-            candidate_pod_id = self.remaining_pods.pop(0)
+            if self.current_pod_i == len(self._cycle):
+                self._cycle = self._get_pod_list()
+                self.current_pod_i = 0
+            candidate_pod_id = int(self._cycle[self.current_pod_i])
+            self.current_pod_i += 1
             # Check if the the pod is in the storage.
             # If in the storage, this will be our departure pod.
             # If it is in the storage, append it to a repeat least
@@ -258,9 +379,9 @@ class CyclicGenerator(DepartureGenerator):
         if self.verbose:
             s = s + " selected pod {}.".format(pod_id)
 
-        # randomly select a station.
-        station_id = numpy.random.choice(list(self.warehouse.stations.keys()), None,
-                                         True, list(self.station_weights.values()))
+        # randomly select a station. It is the same selection as numpy.random.choice.
+        station_id = self._station_ids[numpy.searchsorted(self._station_cdf, numpy.random.random_sample(),
+                                                          side='right')]
         if self.verbose:
             s = s + " for station {}.".format(station_id)
             s = s + " at time {}+1".format(self.warehouse.t)
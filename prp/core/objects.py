@@ -48,6 +48,8 @@ class Station:
         with the pod at the queue head.
         Example:    :math:`\\left\\langle 3,4,1\\right|`
 
+        The queue is stored in a ring buffer of the length max_n, the property creates a new list on every call.
+
     .. note::
 
        The following suggestions can help to keep the station-object consistent:
@@ -57,6 +59,8 @@ class Station:
          because they can refer to internal data.
     """
 
+    __slots__ = ("id", "max_n", "_buffer", "_head", "_size", "former_head")
+
     def __init__(self, id, n):
         """Set parameters of the output station.
 
@@ -65,7 +69,32 @@ class Station:
         """
         self.id = id
         self.max_n = n
-        self.state = []
+        # Ring buffer with the pods. The queue head is at _buffer[_head].
+        self._buffer = [INVALID_ID] * n
+        self._head = 0
+        self._size = 0
+
+    def __copy__(self):
+        """Return an independent station with the same pods."""
+        station = Station.__new__(Station)
+        station.id = self.id
+        station.max_n = self.max_n
+        station._buffer = list(self._buffer)
+        station._head = self._head
+        station._size = self._size
+        if hasattr(self, "former_head"):
+            station.former_head = self.former_head
+        return station
+
+    @property
+    def state(self) -> list:
+        return [self._buffer[(self._head + i) % self.max_n] for i in range(self._size)]
+
+    @state.setter
+    def state(self, state: list):
+        self._buffer = list(state) + [INVALID_ID] * (self.max_n - len(state))
+        self._head = 0
+        self._size = len(state)
 
     def enqueue(self, pod_id: int) -> int:
         """Add a pod into queue.
@@ -83,11 +112,12 @@ class Station:
         # If the queue already has its maximus size, remove the pod from the queue head
         # and store it into former_head.
         former_head = INVALID_ID
-        if len(self.state) >= self.max_n:
-            former_head = self.state.pop(0)
+        if self._size >= self.max_n:
+            former_head = self.dequeue()
 
         # push pod id to the queue
-        self.state.append(pod_id)
+        self._buffer[(self._head + self._size) % self.max_n] = pod_id
+        self._size += 1
         # Return the old pod at the head.
         return former_head
 
@@ -97,11 +127,19 @@ class Station:
         :returns: the former head pod or :attr:`INVALID_ID` if the queue was empty before.
         """
         former_head = INVALID_ID
-        if (len(self.state) > 0):
-            former_head = self.state.pop(0)
+        if self._size > 0:
+            former_head = self._buffer[self._head]
+            self._head = (self._head + 1) % self.max_n
+            self._size -= 1
 
         return former_head
 
+    def head(self) -> int:
+        """Return the pod at the queue head or :attr:`INVALID_ID` if the queue is empty."""
+        if self._size > 0:
+            return self._buffer[self._head]
+        return INVALID_ID
+
     def get_math_param(self) -> int:
         """Return mathematical representation of the output station parameters.
 
@@ -120,15 +158,23 @@ class Station:
 
     def delete_pods(self):
         """Empty queue."""
-        self.state = []
+        self._head = 0
+        self._size = 0
 
     def __len__(self):
         """Return number number of pods in the station."""
-        return len(self.state)
+        return self._size
+
+    def __contains__(self, pod_id):
+        """Return true if the pod is in the station."""
+        for i in range(self._size):
+            if self._buffer[(self._head + i) % self.max_n] == pod_id:
+                return True
+        return False
 
     def is_full(self):
         """Return true if the station is full"""
-        return len(self.state) == self.max_n
+        return self._size == self.max_n
 
 class Costs:
     """Calculate different costs of a system."""
@@ -22,8 +22,12 @@
 This module provides core dynamics of the pod-repositioning-problem.
 """
 
-from copy import deepcopy
+from bisect import bisect_left, insort
+from collections import namedtuple
+from copy import copy, deepcopy
+import numpy
 from prp.core.objects import Station, INVALID_ID, Costs
+import prp.kernels as kernels
 import logging
 
 class PlaceDoesNotExist(Exception):
@@ -121,9 +125,21 @@ class Inconsistency(Exception):
         return "[ERROR] Unexpected algorithm state. {}".format(self.message)
 
 
+def _get_attributes(obj) -> dict:
+    """Return all attributes of an object, also the attributes in __slots__."""
+    attributes = dict(getattr(obj, "__dict__", {}))
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if name not in ("__dict__", "__weakref__") and hasattr(obj, name):
+                attributes[name] = getattr(obj, name)
+    return attributes
+
+
 class DepartureGenerator:
     """This asks the warehouse to put a particular pod to a particular station."""
 
+    __slots__ = ()
+
     def next(self):
         """Generate next tasks.
 
@@ -148,6 +164,41 @@ class DepartureGenerator:
         """Return true if the generator is finite."""
         return len(self) < float("inf")
 
+    def snapshot(self):
+        """Return the state of the generator, which can be passed to :meth:`restore`.
+
+        A back-reference to the warehouse is not part of the state, the generator stays bound to its warehouse.
+        """
+        state = _get_attributes(self)
+        state.pop("warehouse", None)
+        return deepcopy(state)
+
+    def restore(self, state):
+        """Set the state of the generator returned by :meth:`snapshot`."""
+        for (name, value) in deepcopy(state).items():
+            setattr(self, name, value)
+
+
+class StorageObserver:
+    """This is notified when pods enter or leave the storage area of a warehouse.
+
+    Register it with :meth:`Warehouse.add_storage_observer`.
+    """
+
+    __slots__ = ()
+
+    def on_pod_enters_storage(self, pod_id):
+        """The pod was put to a place."""
+        pass
+
+    def on_pod_leaves_storage(self, pod_id):
+        """The pod was removed from its place."""
+        pass
+
+    def on_storage_reset(self):
+        """The places were changed all at once, for example by :meth:`Warehouse.restore`."""
+        pass
+
 
 class MMapping(dict):
     """This class creates a mapping from domain X to image domain Y.
@@ -170,6 +221,112 @@ class MMapping(dict):
         return ret
 
 
+class _PlaceArray:
+    """Mapping place -> pod stored in an int32 array, which is indexed by the place IDs 1, ..., n.
+
+    The array entry 0 belongs to :attr:`INVALID_ID`. It maintains the inverse mapping pod -> place and the sorted
+    list of free places.
+    """
+
+    __slots__ = ("array", "_inverse", "_free_places")
+
+    def __init__(self, n: int = 0):
+        self.array = numpy.full(n + 1, INVALID_ID, dtype=numpy.int32)
+        self._inverse = {}
+        self._free_places = list(range(1, n + 1))
+
+    def __len__(self):
+        return len(self.array) - 1
+
+    def __iter__(self):
+        return iter(range(1, len(self.array)))
+
+    def __contains__(self, place_id):
+        return 0 < place_id < len(self.array)
+
+    def __getitem__(self, place_id):
+        if not 0 < place_id < len(self.array):
+            raise KeyError(place_id)
+        return self.array.item(place_id)
+
+    def __setitem__(self, place_id, pod_id):
+        old_pod_id = self[place_id]
+        if old_pod_id == INVALID_ID:
+            del self._free_places[bisect_left(self._free_places, place_id)]
+        elif self._inverse.get(old_pod_id) == place_id:
+            del self._inverse[old_pod_id]
+        self.array[place_id] = pod_id
+        if pod_id == INVALID_ID:
+            insort(self._free_places, place_id)
+        else:
+            self._inverse[pod_id] = place_id
+
+    def keys(self):
+        return range(1, len(self.array))
+
+    def values(self):
+        return self.array[1:].tolist()
+
+    def items(self):
+        return zip(self.keys(), self.values())
+
+    def resize(self, n: int):
+        """Set the number of places. New places are free."""
+        num_places = len(self)
+        # Forget the removed places.
+        removed_pods = self.array[n + 1:]
+        for pod_id in removed_pods[removed_pods != INVALID_ID].tolist():
+            self._inverse.pop(pod_id, None)
+        del self._free_places[bisect_left(self._free_places, n + 1):]
+        # The new places are larger than all others, that way the free places stay sorted.
+        array = numpy.full(n + 1, INVALID_ID, dtype=numpy.int32)
+        m = min(n, num_places) + 1
+        array[:m] = self.array[:m]
+        self.array = array
+        self._free_places.extend(range(num_places + 1, n + 1))
+
+    def set_array(self, place_to_pod):
+        """Set all places from an array indexed by the place IDs and rebuild the inverse."""
+        self.array[1:] = place_to_pod[1:len(self.array)]
+        places = numpy.arange(1, len(self.array))
+        pods = self.array[1:]
+        occupied = pods != INVALID_ID
+        self._inverse = dict(zip(pods[occupied].tolist(), places[occupied].tolist()))
+        self._free_places = places[~occupied].tolist()
+
+    def empty(self):
+        """Make all places free."""
+        self.array[1:] = INVALID_ID
+        self._inverse = {}
+        self._free_places = list(range(1, len(self.array)))
+
+    @property
+    def free_places(self):
+        """Return the sorted list of the free places. Do not change it."""
+        return self._free_places
+
+    def get_unique_inverse(self, pod_id):
+        """Return the place of the pod or None if the pod is not in a place."""
+        return self._inverse.get(pod_id)
+
+    def get_inverse(self, pod_id):
+        """Return the set of places with the pod."""
+        if pod_id == INVALID_ID:
+            return set(self._free_places)
+        place_id = self._inverse.get(pod_id)
+        if place_id is None:
+            return set()
+        return {place_id}
+
+
+ArrayState = namedtuple("ArrayState", ["place_to_pod", "pod_to_place", "queues", "queue_lengths", "max_n"])
+ArrayState.__doc__ = """State of a warehouse as numpy arrays. All arrays are indexed by IDs, their 0-th entries belong to
+:attr:`INVALID_ID`.
+
+queues[station_id, :n] contains the pods in the station beginning with the queue head, where
+n = queue_lengths[station_id]. max_n contains the station capacities.
+"""
+
 
 class Warehouse:
     """Mathematical model of a warehouse.
@@ -191,6 +348,10 @@ class Warehouse:
        :meth:`next(place)`. Where place is the new place where current pod must move in the next step.
     """
 
+    __slots__ = ("stations", "num_pods", "num_places", "_num_stations", "place_to_pod", "pod_to_station", "t",
+                 "total_costs", "departure_generator", "solver", "_costs", "_cost_tables", "_cached_available_places",
+                 "storage_observers")
+
     class MathematicalState:
         """This is mathematical representation of the warehouse problem.
 
@@ -207,6 +368,8 @@ class Warehouse:
         the next pod which is supposed to go to a station in the next state.
         """
 
+        __slots__ = ("place_to_pod", "output_stations", "t", "total_costs", "next_pod_movement")
+
         def __init__(self):
             self.place_to_pod = {}
             self.output_stations = {}
@@ -221,7 +384,7 @@ class Warehouse:
         self._num_stations = 0
 
         # Create mapping place to pod
-        self.place_to_pod = MMapping()
+        self.place_to_pod = _PlaceArray()
         # Save mapping pod->station. It is an injective mapping.
         self.pod_to_station = {}
         # The information about station->pods is stored in
@@ -234,8 +397,26 @@ class Warehouse:
         self.total_costs = 0.0
         self.departure_generator = None  # a function which ask for a pod to be assigned to a station.
         self.solver = None
+        self._cost_tables = None
         self.costs = None
         self._cached_available_places = None
+        self.storage_observers = []
+
+    def add_storage_observer(self, observer: StorageObserver):
+        """Notify the observer when pods enter or leave the storage area."""
+        self.storage_observers.append(observer)
+
+    def _notify_pod_enters_storage(self, pod_id):
+        for observer in self.storage_observers:
+            observer.on_pod_enters_storage(pod_id)
+
+    def _notify_pod_leaves_storage(self, pod_id):
+        for observer in self.storage_observers:
+            observer.on_pod_leaves_storage(pod_id)
+
+    def _notify_storage_reset(self):
+        for observer in self.storage_observers:
+            observer.on_storage_reset()
 
     def set_num_pods(self, n: int):
         """Set number of pods in the system.
@@ -249,16 +430,13 @@ class Warehouse:
 
         Call this function before assigning pods to places.
         """
-        # Add missing places to place_to_pod function
-        # if N is larger than current number of places.
-        for place_id in range(self.num_places + 1, n + 1):
-            self.place_to_pod[place_id] = INVALID_ID
-
+        # Add missing places to place_to_pod function if N is larger than current number of places.
         # Remove too large point_id if N is smaller than the previous N
-        for place_id in range(n + 1, self.num_places + 1):
-            del self.place_to_pod[place_id]
-
+        self.place_to_pod.resize(n)
         self.num_places = n
+        self._cached_available_places = None
+        self._cost_tables = None
+        self._notify_storage_reset()
 
     @property
     def places(self):
@@ -266,16 +444,13 @@ class Warehouse:
         return range(1, self.num_places + 1)
 
     def _update_available_places(self):
-        self._cached_available_places = []
-        for (place_id, pod_id) in self.place_to_pod.items():
-            if pod_id is INVALID_ID:
-                self._cached_available_places.append(place_id)
+        # Return places always in the same order. This should make the system dynamics more reproducible.
+        # The free places are already sorted.
+        self._cached_available_places = list(self.place_to_pod.free_places)
 
         # Consider next place when this function called outside of solver.decide_new_place.
         if len(self.departure_generator)> 0:
-            self._cached_available_places.append(self.place_by_pod(self.departure_generator.current()[0]))
-        # Return places always in the same order. This should make the system dynamics more reproducible.
-        self._cached_available_places = sorted(self._cached_available_places)
+            insort(self._cached_available_places, self.place_by_pod(self.departure_generator.current()[0]))
 
     @property
     def available_places(self):
@@ -294,12 +469,14 @@ class Warehouse:
         """
         :param station: add station to the system.
         """
-        self.stations[station.id] = deepcopy(station)
+        self.stations[station.id] = copy(station)
+        self._cost_tables = None
 
     def station_of_the_pod(self, pod_id):
-        for station in self.stations.values():
-            if pod_id in station.state:
-                return station.id
+        # Look up the station in pod_to_station. Check the station, because its state could be set directly.
+        station_id = self.pod_to_station.get(pod_id, INVALID_ID)
+        if station_id != INVALID_ID and pod_id in self.stations[station_id]:
+            return station_id
 
         return None  # Nothing found.
 
@@ -320,7 +497,7 @@ class Warehouse:
             raise PlaceDoesNotExist("Cannot assign pod {} to a place.".format(pod_id), place_id)
 
         # Assign the pod only to an empty place.
-        if not self.place_is_free(place_id):
+        if self.place_to_pod[place_id] != INVALID_ID:
             raise PlaceNotEmpty("Cannot assign plot. The place is busy with {}".format(
                 self.place_to_pod[place_id]), place_id)
 
@@ -335,6 +512,7 @@ class Warehouse:
                 "The pod is already assigned to the station {}".format(self.station_of_the_pod(pod_id)), pod_id)
 
         self.place_to_pod[place_id] = pod_id
+        self._notify_pod_enters_storage(pod_id)
 
     def assign_pod_to_station(self, pod_id: int, station_id: int):
         """
@@ -362,15 +540,7 @@ class Warehouse:
         :return: ID of the place with the pod, if the pod is in the storage.
         :return None: if the pod is not in the storage.
         """
-        inv_image = self.place_to_pod.get_inverse(pod_id)
-        if len(inv_image) == 0:
-            return None
-        elif len(inv_image) == 1:
-            return next(iter(inv_image))
-        else:
-            raise Inconsistency(
-                "The a time t={}, the inverse mapping of pod_id {} must be 0 or 1 but it is {} intead.".format(
-                    self.t, pod_id, inv_image))
+        return self.place_to_pod.get_unique_inverse(pod_id)
 
     def pod_by_place(self, place_id):
         """Return ID of the pod in the place."""
@@ -388,6 +558,33 @@ class Warehouse:
         """Set costs function."""
         self.costs = costs
 
+    @property
+    def costs(self) -> Costs:
+        """Return the costs function.
+
+        The costs of all stations and places are copied into tables on the first move. Set the costs again after
+        changing the costs object.
+        """
+        return self._costs
+
+    @costs.setter
+    def costs(self, costs: Costs):
+        self._costs = costs
+        self._cost_tables = None
+
+    def _build_cost_tables(self):
+        """Return the costs as nested lists (from_station[station_id][place_id], to_station[place_id][station_id])."""
+        costs = self._costs
+        num_stations = max(self.stations.keys()) + 1
+        from_station = [[0.0] * (self.num_places + 1) for _ in range(num_stations)]
+        to_station = [[0.0] * num_stations for _ in range(self.num_places + 1)]
+        for station_id in self.stations:
+            for place_id in self.places:
+                from_station[station_id][place_id] = costs.from_station(station_id, place_id)
+                to_station[place_id][station_id] = costs.to_station(place_id, station_id)
+        self._cost_tables = (from_station, to_station)
+        return self._cost_tables
+
     def move_pod_from_station(self, pod_id: int, station_id: int, place_id: int):
         """Move pod from station to a place.
 
@@ -405,12 +602,16 @@ class Warehouse:
 
         station.former_head = INVALID_ID
         # Add costs for the movement.
-        self.total_costs += self.costs.from_station(station_id=station_id, place_id=place_id)
+        cost_tables = self._cost_tables
+        if cost_tables is None:
+            cost_tables = self._build_cost_tables()
+        self.total_costs += cost_tables[0][station_id][place_id]
 
         # Update pod<->place mapping.
         self.place_to_pod[place_id] = pod_id
         # Update pod<->station mapping.
         self.pod_to_station[pod_id] = INVALID_ID
+        self._notify_pod_enters_storage(pod_id)
         return pod_id
 
     def move_pod_to_station(self, pod_id: int, station_id: int):
@@ -434,8 +635,13 @@ class Warehouse:
 
         # Remove place from the pod<->place mappings
         self.place_to_pod[place_id] = INVALID_ID
+        self._notify_pod_leaves_storage(pod_id)
         # Update distance information. Add the distance to the station.
-        self.total_costs += self.costs.to_station(place_id, station_id)
+        cost_tables = self._cost_tables
+        if cost_tables is None:
+            cost_tables = self._build_cost_tables()
+        self.total_costs += cost_tables[1][place_id][station_id]
+        self.pod_to_station[pod_id] = station_id
         return self.stations[station_id].enqueue(pod_id)
 
     def _on_next_task_selected(self, t, pod_id, station_id):
@@ -472,17 +678,19 @@ class Warehouse:
         :return (pod_id, from): return pod for repositioning and the station it leaves.
         :return (INVALID_ID, INVALID_ID): if no pod must be repositioned in the next step.
         """
+        departure_generator = self.departure_generator
         # Stop when there is no more departure.
-        if len(self.departure_generator) == 0:
+        if len(departure_generator) == 0:
             return (INVALID_ID, INVALID_ID)
 
         # First move pod to a station.
 
-        (pod_id, station_id) = self.departure_generator.current()
+        (pod_id, station_id) = departure_generator.current()
 
         if pod_id != INVALID_ID:
-            if self.stations[station_id].is_full():
-                return (self.stations[station_id].state[0], station_id)
+            station = self.stations[station_id]
+            if station.is_full():
+                return (station.head(), station_id)
 
         return (INVALID_ID, INVALID_ID)
 
@@ -493,49 +701,153 @@ class Warehouse:
         :return True: if the warehouse problem is not finished.
         :return False: if the warehouse problems stops.
         """
+        departure_generator = self.departure_generator
         # if tasks are empty stop
-        if len(self.departure_generator) == 0:
+        if len(departure_generator) == 0:
             return False
 
         # First move pod to a station.
-        (pod, station_id) = self.departure_generator.current()
+        (pod, station_id) = departure_generator.current()
         self._on_next_task_selected(self.t, pod, station_id)
 
-        (pod_to_reposition, from_station_id) = self.next_arrival_to_storage()
+        # The head of a full station must leave it, see next_arrival_to_storage.
+        pod_to_reposition = INVALID_ID
         if pod != INVALID_ID:
+            station = self.stations[station_id]
+            if station.is_full():
+                pod_to_reposition = station.head()
             # Enqueue the pod to the station and update costs.
             self.move_pod_to_station(pod, station_id)
 
         # If one pod needs to leave the station, move it to the new place.
         if pod_to_reposition != INVALID_ID:
             # Move leaving pod from station to new place and update costs.
-            self.move_pod_from_station(pod_to_reposition, from_station_id, place)
+            self.move_pod_from_station(pod_to_reposition, station_id, place)
 
         # Update time.
         self.t += 1
         # Move to the next departure if there is one.
-        self.departure_generator.next()
-        if len(self.departure_generator) > 0:
-            self._update_available_places()
-            logging.debug("Next departure at t = {} is {}".format(self.t, self.departure_generator.current()))
+        departure_generator.next()
+        if len(departure_generator) > 0:
+            # Update the available places on the first access in the new state.
+            self._cached_available_places = None
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug("Next departure at t = %s is %s", self.t, departure_generator.current())
             return True
         else:
             return False
 
+    def replay(self, places) -> bool:
+        """Go through the next departures with given places, like calls of :meth:`next` with every place in turn.
+
+        The time steps run in the compiled kernel :func:`prp.kernels.replay`. The departure generator must provide
+        get_all_departures, like :class:`DeterministicDepartures`. The callbacks and the storage observers are not
+        called in every time step, the observers are notified with :meth:`StorageObserver.on_storage_reset` at the end.
+        If a time step is not possible, :meth:`next` is called for all places and raises the exception.
+
+        :param places: place for the leaving pod of every time step. It is ignored if no pod leaves a station.
+        :return: the same as :meth:`next` in the last time step.
+        """
+        departure_generator = self.departure_generator
+        departures = numpy.asarray(departure_generator.get_all_departures(), dtype=numpy.int64)[:len(places)]
+        cost_tables = self._cost_tables
+        if cost_tables is None:
+            cost_tables = self._build_cost_tables()
+        state = self.to_arrays()
+        (total_costs, num_steps) = kernels.replay(
+            state.place_to_pod, state.pod_to_place, state.queues, state.queue_lengths, state.max_n, departures,
+            numpy.array(cost_tables[0], dtype=numpy.float64), numpy.array(cost_tables[1], dtype=numpy.float64),
+            numpy.asarray(places[:len(departures)], dtype=numpy.int64), float(self.total_costs))
+        if num_steps < len(departures):
+            # Repeat the steps in Python to get the exception at the right time step.
+            for place_id in places:
+                self.next(place_id)
+            return len(departure_generator) > 0
+
+        self.from_arrays(state)
+        self.total_costs = total_costs
+        self.t += num_steps
+        for _ in range(num_steps):
+            departure_generator.next()
+        return len(departure_generator) > 0
+
     def finished(self):
         """Is problem finished?"""
         return len(self.departure_generator) == 0
 
+    def num_pending_departures(self):
+        """Return the number of remaining departures including the current one.
+
+        For a finite departure generator this is the number of calls of :meth:`next` until the problem is finished.
+        """
+        return len(self.departure_generator)
+
+    def snapshot(self):
+        """Return the state of the warehouse, which can be passed to :meth:`restore`.
+
+        The state contains only the parts of the warehouse which change in :meth:`next`. It is much cheaper
+        than a deep copy of the warehouse.
+        """
+        stations = tuple((station.state, getattr(station, "former_head", INVALID_ID))
+                         for station in self.stations.values())
+        return (self.place_to_pod.array.copy(), dict(self.pod_to_station), stations, self.t, self.total_costs,
+                self.departure_generator.snapshot())
+
+    def to_arrays(self) -> ArrayState:
+        """Return the places and stations as int32 arrays, for example for the kernels of :mod:`prp.kernels`."""
+        place_to_pod = self.place_to_pod.array.copy()
+        pod_to_place = numpy.zeros(self.num_pods + 1, dtype=numpy.int32)
+        pod_to_place[place_to_pod] = numpy.arange(self.num_places + 1, dtype=numpy.int32)
+        pod_to_place[INVALID_ID] = INVALID_ID
+
+        n_stations = max(self.stations.keys()) + 1
+        max_n = numpy.zeros(n_stations, dtype=numpy.int32)
+        for station in self.stations.values():
+            max_n[station.id] = station.max_n
+        queues = numpy.zeros((n_stations, max(max_n)), dtype=numpy.int32)
+        queue_lengths = numpy.zeros(n_stations, dtype=numpy.int32)
+        for station in self.stations.values():
+            state = station.get_math_state()
+            queues[station.id, :len(state)] = state
+            queue_lengths[station.id] = len(state)
+        return ArrayState(place_to_pod, pod_to_place, queues, queue_lengths, max_n)
+
+    def from_arrays(self, state: ArrayState):
+        """Set the places and stations from arrays returned by :meth:`to_arrays`.
+
+        Time, costs and departures are not changed.
+        """
+        self.place_to_pod.set_array(state.place_to_pod)
+        self.pod_to_station = {}
+        for station in self.stations.values():
+            station.state = state.queues[station.id, :state.queue_lengths[station.id]].tolist()
+            for pod_id in station.state:
+                self.pod_to_station[pod_id] = station.id
+        self._cached_available_places = None
+        self._notify_storage_reset()
+
+    def restore(self, state):
+        """Set the state of the warehouse returned by :meth:`snapshot`.
+
+        The same state can be restored multiple times.
+        """
+        (place_to_pod, pod_to_station, stations, self.t, self.total_costs, departures_state) = state
+        self.place_to_pod.set_array(place_to_pod)
+        self.pod_to_station = dict(pod_to_station)
+        for (station, (station_state, former_head)) in zip(self.stations.values(), stations):
+            station.state = station_state
+            station.former_head = former_head
+        self.departure_generator.restore(departures_state)
+        self._cached_available_places = None
+        self._notify_storage_reset()
+
     def get_mathematical_state(self) -> MathematicalState:
         ret_val = Warehouse.MathematicalState()
-        for place_id, pod_id in self.place_to_pod.items():
-            if pod_id is not None:
-                ret_val.place_to_pod[place_id] = pod_id
-            else:
-                ret_val.place_to_pod[place_id] = INVALID_ID
+        # Free places contain INVALID_ID already.
+        ret_val.place_to_pod = dict(self.place_to_pod.items())
 
         for station in self.stations.values():
-            ret_val.output_stations[station.id] = deepcopy(station.get_math_state())
+            ret_val.output_stations[station.id] = station.get_math_state()
 
         ret_val.t = self.t
         ret_val.total_costs = self.total_costs
@@ -543,19 +855,21 @@ class Warehouse:
         if self.departure_generator is None:
             ret_val.next_pod_movement = None
         else:
-            ret_val.next_pod_movement = deepcopy(self.departure_generator.current())
+            ret_val.next_pod_movement = self.departure_generator.current()
 
         return ret_val
 
     def empty_storage_area(self):
         """Remove all pods from the storage."""
-        for place_id, pod_id in self.place_to_pod.items():
-            self.place_to_pod[place_id] = INVALID_ID
+        self.place_to_pod.empty()
+        self._cached_available_places = None
+        self._notify_storage_reset()
 
     def empty_stations(self):
         """Remove pods from stations."""
         for station in self.stations.values():
             station.delete_pods()
+        self.pod_to_station = {}
 
     def delete_pods(self):
         """Remove all pods from the warehouse."""
@@ -0,0 +1,314 @@
+# Pod Repositioning Problem
+# Copyright (C) 2017, 2018 Arbeitsgruppe OR an der Leuphana Universität Lüneburg
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Numba-compiled kernels for the hot loops of solvers and heuristics.
+
+The kernels work on numpy arrays only. Pod and place IDs are used as indices, costs are matrices as returned by
+:func:`prp.core.costs.get_cost_matrices`. All kernels are cached on disk, import :mod:`prp._numba_warmup`
+to compile them before the first real call.
+"""
+import numpy
+from numba import njit
+
+
+@njit(cache=True, fastmath=True)
+def store_step(x, pod, place_id, previous_location, station_id, pod_location, current_cfg, orig_cfg,
+               from_station_mat, to_station_mat, iterations):
+    """Store the movement of time step x in the configuration arrays and return its costs.
+
+    Only the two changed cells of the live configuration are edited, the result is
+    then written once as snapshot of the next time step.
+
+    The configurations are indexed by place IDs and pod_location by pod IDs. Their 0-th entries belong to
+    :attr:`INVALID_ID`, they absorb the writes of time steps in which no pod moves.
+    """
+    current_cfg[previous_location] = 0
+    current_cfg[place_id] = pod
+    pod_location[pod] = place_id
+
+    # There are only costs if a movement is made. Multiply by 0 or 1 instead of branching. The lookups are
+    # always valid, because the cost matrices have zero rows and columns for INVALID_ID.
+    moved = (place_id != 0) & (previous_location != 0)
+    step_costs = (from_station_mat[station_id, place_id] + to_station_mat[previous_location, station_id]) * moved
+
+    # Cannot store configurations in the last iteration.
+    if x != iterations - 1:
+        orig_cfg[x + 1, :] = current_cfg
+    return step_costs
+
+
+@njit(cache=True)
+def _move_pod_to_station(pod, station_id, place_to_pod, pod_to_place, queues, queue_lengths, max_n):
+    """Move the departing pod from its place to the station.
+
+    :return: the former head of the station if the station was full, otherwise 0.
+    """
+    place_id = pod_to_place[pod]
+    place_to_pod[place_id] = 0
+    pod_to_place[pod] = 0
+    leaving_pod = 0
+    n = queue_lengths[station_id]
+    if n >= max_n[station_id]:
+        leaving_pod = queues[station_id, 0]
+        for i in range(n - 1):
+            queues[station_id, i] = queues[station_id, i + 1]
+        n -= 1
+    queues[station_id, n] = pod
+    queue_lengths[station_id] = n + 1
+    return leaving_pod
+
+
+@njit(cache=True)
+def simulate_cheapest_place(place_to_pod, pod_to_place, queues, queue_lengths, max_n, departures,
+                            from_station_mat, to_station_mat, decisions, start):
+    """Simulate a warehouse with deterministic departures and return its total costs.
+
+    The state arrays are those of :func:`get_state_arrays`, they are changed in place. The places for the time
+    steps before start are replayed from decisions. From start on, every pod leaving a station goes to the cheapest
+    free place as with :class:`prp.solvers.simple.CheapestPlaceSolver` and costs type DECISION, and the place is
+    written into decisions.
+
+    :return: total costs, or infinity if a replayed decision does not put a leaving pod to a free place.
+    """
+    n_places = place_to_pod.shape[0] - 1
+    n_departures = departures.shape[0]
+    # A pod will go to a station again if it occurs in the remaining departures.
+    last_departure = numpy.full(pod_to_place.shape[0], -1, dtype=numpy.int64)
+    for t in range(n_departures):
+        last_departure[departures[t, 0]] = t
+
+    total_costs = 0.0
+    for t in range(n_departures):
+        pod = departures[t, 0]
+        station_id = departures[t, 1]
+        if pod == 0:
+            decisions[t] = 0
+            continue
+
+        total_costs += to_station_mat[pod_to_place[pod], station_id]
+        leaving_pod = _move_pod_to_station(pod, station_id, place_to_pod, pod_to_place, queues, queue_lengths, max_n)
+        if leaving_pod == 0:
+            decisions[t] = 0
+            continue
+
+        if t < start:
+            new_place_id = decisions[t]
+            if new_place_id == 0 or place_to_pod[new_place_id] != 0:
+                return numpy.inf
+        else:
+            # Ties go to the place with the smallest ID.
+            goes_again = last_departure[leaving_pod] >= t
+            new_place_id = 0
+            cheapest_costs = numpy.inf
+            for p in range(1, n_places + 1):
+                if place_to_pod[p] != 0:
+                    continue
+                c = from_station_mat[station_id, p]
+                if goes_again:
+                    c += to_station_mat[p, station_id]
+                if c < cheapest_costs:
+                    cheapest_costs = c
+                    new_place_id = p
+            decisions[t] = new_place_id
+
+        total_costs += from_station_mat[station_id, new_place_id]
+        place_to_pod[new_place_id] = leaving_pod
+        pod_to_place[leaving_pod] = new_place_id
+
+    return total_costs
+
+
+@njit(cache=True)
+def replay(place_to_pod, pod_to_place, queues, queue_lengths, max_n, departures, from_station_mat, to_station_mat,
+           places, total_costs):
+    """Simulate the departures with given places for the leaving pods as :meth:`prp.core.warehouse.Warehouse.next`.
+
+    The state arrays are those of :func:`get_state_arrays`, they are changed in place. The leaving pod of time step t
+    goes to places[t], the entry is ignored if no pod leaves a station. The costs are added to total_costs in the same
+    order as in the warehouse.
+
+    :return: tuple (total costs, number of simulated time steps). The simulation stops before the first time step
+        whose departing pod is not in the storage or whose place is not free.
+    """
+    n_departures = departures.shape[0]
+    for t in range(n_departures):
+        pod = departures[t, 0]
+        station_id = departures[t, 1]
+        if pod == 0:
+            continue
+        if pod_to_place[pod] == 0:
+            return total_costs, t
+
+        # A pod leaves the station if the station is full.
+        new_place_id = 0
+        if queue_lengths[station_id] >= max_n[station_id]:
+            new_place_id = places[t]
+            if new_place_id < 1 or new_place_id >= place_to_pod.shape[0] or \
+                    (place_to_pod[new_place_id] != 0 and new_place_id != pod_to_place[pod]):
+                return total_costs, t
+
+        total_costs += to_station_mat[pod_to_place[pod], station_id]
+        leaving_pod = _move_pod_to_station(pod, station_id, place_to_pod, pod_to_place, queues, queue_lengths, max_n)
+        if leaving_pod == 0:
+            continue
+
+        total_costs += from_station_mat[station_id, new_place_id]
+        place_to_pod[new_place_id] = leaving_pod
+        pod_to_place[leaving_pod] = new_place_id
+
+    return total_costs, n_departures
+
+
+@njit(cache=True)
+def evaluate_ordered(genome, place_order, place_to_pod, pod_to_place, queues, queue_lengths, max_n, departures,
+                     from_station_mat, to_station_mat):
+    """Simulate a warehouse solved with a genome of free place indices and return its average costs.
+
+    Every gene is the index of the new place among the available places sorted by place_order, modulo the number
+    of available places, as in :class:`prp.solvers.evolution_only_free.Helper`. The state arrays are those of
+    :func:`get_state_arrays`, they are changed in place.
+
+    :return: total costs divided by the number of time steps, or infinity if the genome is too short.
+    """
+    n_departures = departures.shape[0]
+    available = numpy.empty(place_order.shape[0], dtype=place_order.dtype)
+    total_costs = 0.0
+    next_gene = 0
+    for t in range(n_departures):
+        pod = departures[t, 0]
+        station_id = departures[t, 1]
+        if pod == 0:
+            continue
+
+        total_costs += to_station_mat[pod_to_place[pod], station_id]
+        leaving_pod = _move_pod_to_station(pod, station_id, place_to_pod, pod_to_place, queues, queue_lengths, max_n)
+        if leaving_pod == 0:
+            continue
+
+        if next_gene >= genome.shape[0]:
+            return numpy.inf
+        n_available = 0
+        for p in place_order:
+            if place_to_pod[p] == 0:
+                available[n_available] = p
+                n_available += 1
+        new_place_id = available[genome[next_gene] % n_available]
+        next_gene += 1
+
+        total_costs += from_station_mat[station_id, new_place_id]
+        place_to_pod[new_place_id] = leaving_pod
+        pod_to_place[leaving_pod] = new_place_id
+
+    return total_costs / n_departures
+
+
+@njit(cache=True)
+def _block_sum(a, begin, n):
+    """Return the sum of a[begin:begin + n] for n <= 128 with the same rounding as numpy.sum."""
+    if n < 8:
+        res = 0.0
+        for i in range(begin, begin + n):
+            res += a[i]
+        return res
+    # Eight partial sums, like the unrolled loop of numpy.
+    r = a[begin:begin + 8].copy()
+    i = 8
+    while i < n - (n % 8):
+        for j in range(8):
+            r[j] += a[begin + i + j]
+        i += 8
+    res = ((r[0] + r[1]) + (r[2] + r[3])) + ((r[4] + r[5]) + (r[6] + r[7]))
+    while i < n:
+        res += a[begin + i]
+        i += 1
+    return res
+
+
+@njit(cache=True)
+def _pairwise_sum(a):
+    """Return the sum of a with the same pairwise summation and rounding as numpy.sum.
+
+    numpy splits the array recursively into halves until the parts have at most 128 elements. The kernel uses an
+    explicit stack instead of recursion, because numba cannot load recursive functions from its cache.
+    """
+    begins = numpy.empty(128, dtype=numpy.int64)
+    sizes = numpy.empty(128, dtype=numpy.int64)
+    split = numpy.zeros(128, dtype=numpy.bool_)
+    sums = numpy.empty(128)
+    n_tasks = 1
+    n_sums = 0
+    begins[0] = 0
+    sizes[0] = a.size
+    while n_tasks > 0:
+        n_tasks -= 1
+        (begin, n) = (begins[n_tasks], sizes[n_tasks])
+        if n <= 128:
+            sums[n_sums] = _block_sum(a, begin, n)
+            n_sums += 1
+        elif split[n_tasks]:
+            # Both halves are summed up.
+            n_sums -= 1
+            sums[n_sums - 1] += sums[n_sums]
+        else:
+            n2 = n // 2
+            n2 -= n2 % 8
+            # Add the halves after they are summed up. Sum up the first half first.
+            split[n_tasks] = True
+            begins[n_tasks + 1] = begin + n2
+            sizes[n_tasks + 1] = n - n2
+            split[n_tasks + 1] = False
+            begins[n_tasks + 2] = begin
+            sizes[n_tasks + 2] = n2
+            split[n_tasks + 2] = False
+            n_tasks += 3
+    return sums[0]
+
+
+@njit(cache=True)
+def _choice_index(probabilities, u):
+    """Return the index which numpy.random.choice selects for probabilities and the uniform random number u."""
+    n = probabilities.size
+    cdf = numpy.cumsum(probabilities)
+    last = cdf[n - 1]
+    for i in range(n - 1):
+        if cdf[i] / last > u:
+            return i
+    return n - 1
+
+
+@njit(cache=True)
+def sample_pod(pod_weights, pods, u):
+    """Return a pod selected from pods proportional to its weight.
+
+    The selection is the same as the one of numpy.random.choice, if u is a uniformly distributed random number of
+    the numpy.random state. That way the departures do not depend on the use of the kernel.
+
+    :param pod_weights: weights indexed by pod_id.
+    :param pods: IDs of the pods which may departure.
+    :param u: random number in [0, 1).
+    """
+    weights = numpy.empty(pods.size)
+    for i in range(pods.size):
+        weights[i] = pod_weights[pods[i]]
+    weights /= _pairwise_sum(weights)
+    return pods[_choice_index(weights, u)]
+
+
+def get_state_arrays(warehouse):
+    """Return the state of a warehouse as arrays for the simulation kernels.
+
+    :return: :class:`prp.core.warehouse.ArrayState`, see :meth:`prp.core.warehouse.Warehouse.to_arrays`.
+    """
+    return warehouse.to_arrays()
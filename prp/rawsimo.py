@@ -22,8 +22,10 @@ Convert rawsimo files to PRP JSON files.
 18 Januar 2019
 """
 
+import csv
 import math
 import xml.etree.ElementTree as ET
+import numpy
 import networkx as nx
 import networkx.algorithms.shortest_paths as shortest_paths
 import prp.core.warehouse as system_mod
@@ -58,6 +60,9 @@ class LayoutGrpah:
 
         current_wg_place = 1 # The place id for warehouse game. It startes with 1.
 
+        # Read nodes and edges in one pass over the waypoints.
+        nodes = []
+        edges = []
         for waypoint in waypoints:
             x = float(waypoint.attrib["X"])
             y = float(waypoint.attrib["Y"])
@@ -69,29 +74,29 @@ class LayoutGrpah:
                 # ids 0, 1, 2,... in warehouse game the station ids are 1, 3, 3,...
                 self.node_to_station[ID] = station_ID + 1
 
-            if waypoint.attrib["PodStorageLocation"]=="true":
+            may_have_pods = waypoint.attrib["PodStorageLocation"] == "true"
+            if may_have_pods:
                 self.place_nodes.append(ID)
                 self.node_to_place[ID] = current_wg_place
                 current_wg_place += 1
             self.positions[ID] = (x, y)
-            # Add position in graph viz format
-            may_have_pods = waypoint.attrib["PodStorageLocation"]=="true"
             pod_id = int(waypoint.attrib["Pod"])
-            self.graph.add_node(ID, x=x, y=y, may_have_pods=may_have_pods, pod_id=pod_id)
+            nodes.append((ID, {"x": x, "y": y, "may_have_pods": may_have_pods, "pod_id": pod_id}))
             if pod_id >= 0:
                 self.pods[pod_id] = ID
-        # Add edges.
-        for waypoint in waypoints:
-            from_ID = int(waypoint.attrib["ID"])
+            # Read adjacent nodes. The nodes and edges are added to the graph after the loop.
             paths = next(waypoint.iter("Paths"))
-            # Read adjacent nodes.
-            previous = from_ID
             for neigbour in paths:
                 if neigbour.tag == "Waypoint":
-                    to_ID = int(neigbour.text)
-                    # Calculate distance
-                    d = self.edge_distance(from_ID, to_ID)
-                    self.graph.add_edge(from_ID, to_ID, d=d)
+                    edges.append((ID, int(neigbour.text)))
+        self.graph.add_nodes_from(nodes)
+        # Add edges. Calculate the distances of all edges at once, like edge_distance.
+        from_positions = numpy.array([self.positions[from_ID] for (from_ID, _) in edges], dtype=numpy.float64)
+        to_positions = numpy.array([self.positions[to_ID] for (_, to_ID) in edges], dtype=numpy.float64)
+        diff = (from_positions - to_positions).reshape(-1, 2)
+        distances = numpy.sqrt(diff[:, 0]**2 + diff[:, 1]**2)
+        self.graph.add_edges_from((from_ID, to_ID, {"d": d})
+                                  for ((from_ID, to_ID), d) in zip(edges, distances.tolist()))
         self.update_graph_viz()
 
     def is_place(self, node_id):
@@ -99,14 +104,17 @@ class LayoutGrpah:
 
         Place means that the corresponding node (waipoint in rawsimo) may carry place.
         """
-        return self.graph.nodes[node_id]["may_have_pods"]
+        # Every place has a place ID, a dictionary lookup is cheaper than the node attributes of the graph.
+        return node_id in self.node_to_place
 
     def is_station(self, node_id):
-        return node_id in self.station_nodes
+        return node_id in self.node_to_station
 
     def edge_distance(self, i, j):
-        x_diff = self.graph.nodes[i]["x"] - self.graph.nodes[j]["x"]
-        y_diff = self.graph.nodes[i]["y"] - self.graph.nodes[j]["y"]
+        (x_i, y_i) = self.positions[i]
+        (x_j, y_j) = self.positions[j]
+        x_diff = x_i - x_j
+        y_diff = y_i - y_j
         return math.sqrt(x_diff**2+y_diff**2)
 
     def distance_graph_from_station(self):
@@ -116,15 +124,11 @@ class LayoutGrpah:
         in the path which can carry pods could not be crossed. But the very last node must be able to
         carry pods. To prevent this crossing we return a graph where places with pods are only
         destinations but never the sources.
-        """
-        g = nx.DiGraph()
-        g.add_nodes_from(self.graph)
-        # Add edges
-        for (edge_id, v) in self.graph.edges().items():
-            if not self.is_place(edge_id[0]):
-                g.add_edge(edge_id[0], edge_id[1], weight=v["d"])
 
-        return g
+        :return: a read-only view of the layout graph, not a copy.
+        """
+        places = self.node_to_place
+        return nx.subgraph_view(self.graph, filter_edge=lambda u, v: u not in places)
 
     def distance_graph_to_station(self):
         """Return distance graph from places to stations.
@@ -133,66 +137,56 @@ class LayoutGrpah:
         in the path which can carry pods could not be crossed. But the very last node must be able to
         carry pods. To prevent this crossing we return a graph where places with pods are only
         sources but never destinations.
-        """
-        g = nx.DiGraph()
-        g.add_nodes_from(self.graph)
-        # Add edges
-        for (edge_id, v) in self.graph.edges().items():
-            if not self.is_place(edge_id[1]):
-                g.add_edge(edge_id[0], edge_id[1], weight=v["d"])
 
-        return g
+        :return: a read-only view of the layout graph, not a copy.
+        """
+        places = self.node_to_place
+        return nx.subgraph_view(self.graph, filter_edge=lambda u, v: v not in places)
 
     def update_graph_viz(self):
         # Update graphiv attributes
         for (node_id, v) in self.graph.nodes().items():
             # Add position in graph viz format
             gvz_pos = "{},{}!".format(self.gvz_scale*v["x"],self.gvz_scale*v["y"])
-            self.graph.nodes[node_id]["pos"] = gvz_pos
+            v["pos"] = gvz_pos
             # If it may have pods mark it yellow
             if v["may_have_pods"]:
-                self.graph.nodes[node_id]["style"] = "filled"
-                self.graph.nodes[node_id]["fillcolor"] = "yellow"
-            if node_id in self.station_nodes:
-                self.graph.nodes[node_id]["style"] = "filled"
-                self.graph.nodes[node_id]["fillcolor"] = "green"
+                v["style"] = "filled"
+                v["fillcolor"] = "yellow"
+            if node_id in self.node_to_station:
+                v["style"] = "filled"
+                v["fillcolor"] = "green"
 
     def update_heatmap_graph_viz(self, map):
-        min_val = min(map.values())
-        max_val = max(map.values())
+        # Calculate the color indices of all nodes at once. numpy.rint rounds halves to even like round.
+        values = numpy.fromiter(map.values(), dtype=numpy.float64, count=len(map))
+        min_val = values.min()
+        max_val = values.max()
+        color_indices = numpy.rint(9 - (values - min_val) / (max_val - min_val) * 8).astype(numpy.int64)
+        node_colors = dict(zip(map.keys(), color_indices.tolist()))
 
         for (node_id, v) in self.graph.nodes().items():
-            if node_id in map.keys():
-                self.graph.nodes[node_id]["style"] = "filled"
-                color_index = round(9-(map[node_id]-min_val)/(max_val-min_val)*8)
-                self.graph.nodes[node_id]["fillcolor"] = "/blues9/{}".format(color_index)
-                self.graph.nodes[node_id]["label"]="{}({})".format(node_id, map[node_id])
+            if node_id in node_colors:
+                v["style"] = "filled"
+                v["fillcolor"] = "/blues9/{}".format(node_colors[node_id])
+                v["label"] = "{}({})".format(node_id, map[node_id])
             else:
-                try:
-                    del self.graph.nodes[node_id]["fillcolor"]
-                except:
-                    pass
+                v.pop("fillcolor", None)
 
     def distances_from_station(self):
         """Return a table with distances from station to places.
 
         The table is a nested dictionary with station waypoint -> place waypoint -> distance.
         """
-        #
+        places = self.node_to_place
         g = self.distance_graph_from_station()
-        all_distances = shortest_paths.all_pairs_dijkstra_path_length(g)
-        # Look only at stations
+        # Run Dijkstra only from the stations, not from all nodes.
         from_station_distances = {}
-        for (from_node_id, from_distances) in all_distances:
-            # Focus only on stations.
-            if self.is_station(from_node_id):
-                to_place_distances = {}
-                for (dest_wp_id, length) in from_distances.items():
-                    # Focus only on places.
-                    if self.is_place(dest_wp_id):
-                        to_place_distances[dest_wp_id] = length
-
-                from_station_distances[from_node_id] = to_place_distances
+        for from_node_id in self.station_nodes:
+            from_distances = shortest_paths.single_source_dijkstra_path_length(g, from_node_id, weight="d")
+            # Focus only on places.
+            from_station_distances[from_node_id] = {dest_wp_id: from_distances[dest_wp_id]
+                                                    for dest_wp_id in from_distances.keys() & places.keys()}
         return from_station_distances
 
     def distances_to_station(self):
@@ -200,21 +194,15 @@ class LayoutGrpah:
 
         The table is a nested dictionary with place waypoint ->station waypoint -> distance.
         """
-        # get
-        g = self.distance_graph_to_station()
-        all_distances = shortest_paths.all_pairs_dijkstra_path_length(g)
-        # Look only at stations
+        # Run Dijkstra from the stations on the reversed graph. It returns the distances from all nodes to the station.
+        places = self.node_to_place
+        g = self.distance_graph_to_station().reverse(copy=False)
         from_places_distances = {}
-        for (from_node_id, from_distances) in all_distances:
-            # Focus only on places.
-            if self.is_place(from_node_id):
-                to_station_distances = {}
-                for (dest_wp_id, length) in from_distances.items():
-                    # Focus only on stations.
-                    if self.is_station(dest_wp_id):
-                        to_station_distances[dest_wp_id] = length
-
-                        from_places_distances[from_node_id] = to_station_distances
+        for to_node_id in self.station_nodes:
+            to_distances = shortest_paths.single_source_dijkstra_path_length(g, to_node_id, weight="d")
+            # Focus only on places. Places which do not reach any station are left out.
+            for from_node_id in to_distances.keys() & places.keys():
+                from_places_distances.setdefault(from_node_id, {})[to_node_id] = to_distances[from_node_id]
         return from_places_distances
 
 
@@ -224,23 +212,15 @@ class LayoutGrpah:
 
     def store_distances_to_csv(self, filename):
         """Store distances into a CSV file."""
-        # Joint to a table
-        table = []
-        for (from_node, to_nodes) in self.station_to_place.items():
-            for (to_node, distance) in to_nodes.items():
-                row = {}
-                row["StationNode"] = from_node
-                row["PlaceNode"] = to_node
-                row["FromStationDistance"] = distance
-                row["ToStationDistance"] = self.place_to_station[to_node][from_node]
-                table.append(row)
+        # Joint to a table. Plain tuples avoid a dictionary per row.
+        table = ((from_node, to_node, distance, self.place_to_station[to_node][from_node])
+                 for (from_node, to_nodes) in self.station_to_place.items()
+                 for (to_node, distance) in to_nodes.items())
 
         with open(filename, "w") as csvfile:
-            fieldnames = ["StationNode", "PlaceNode", "FromStationDistance", "ToStationDistance"]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames, lineterminator='\n')
-            writer.writeheader()
+            writer = csv.writer(csvfile, lineterminator='\n')
+            writer.writerow(["StationNode", "PlaceNode", "FromStationDistance", "ToStationDistance"])
             writer.writerows(table)
-            csvfile.close()
 
     def load_distances_from_csv(self, filename):
         self.station_to_place = {}
@@ -260,9 +240,11 @@ class LayoutGrpah:
             csvfile.close()
 
     def average_distance(self, place_node, weights):
+        station_to_place = self.station_to_place
+        to_station = self.place_to_station[place_node]
         result = 0
         for station_node, weight in weights.items():
-            result+= weight*(self.station_to_place[station_node][place_node] + self.place_to_station[place_node][station_node])
+            result += weight*(station_to_place[station_node][place_node] + to_station[station_node])
         return result
 
     def uniform_station_weights(self):
@@ -278,10 +260,16 @@ class LayoutGrpah:
 
         This function assume uniform station weights.
         """
-        w = self.uniform_station_weights()
+        # With uniform weights the average is the sum of the distances divided once by the number of stations.
+        station_nodes = self.station_nodes
+        station_to_place = [self.station_to_place[station_node] for station_node in station_nodes]
+        place_to_station = self.place_to_station
+        nstations = len(station_nodes)
         table = {}
         for place_id in self.place_nodes:
-            table[place_id] = self.average_distance(place_id, w)
+            to_station = place_to_station[place_id]
+            table[place_id] = sum(from_station[place_id] + to_station[station_node]
+                                  for (station_node, from_station) in zip(station_nodes, station_to_place)) / nstations
 
         return table
 
@@ -310,22 +298,36 @@ class LayoutGrpah:
 
         The to station costs is Manhattan distance to station tail + the lengths of the station.
         From station costs are costs from the station head.
+
+        :raise ValueError: if a place cannot be reached from a station or does not reach a station. DictCosts would
+            return 0 for the missing distance and the place would look like the cheapest one.
         """
-        ret_val = costs_mod.DictCosts()
+        for station_node in self.station_nodes:
+            from_station = self.station_to_place.get(station_node, {})
+            for place_node in self.place_nodes:
+                if place_node not in from_station or station_node not in self.place_to_station.get(place_node, {}):
+                    raise ValueError("No path between station waypoint {} and place waypoint {}.".format(
+                        station_node, place_node))
+
+        ret_val = costs_mod.DictCosts(capacity=(len(self.station_nodes), len(self.place_nodes)))
         # Set functions' domain.
         ret_val.set_num_stations(len(self.station_nodes))
         ret_val.set_num_places(len(self.place_nodes))
 
+        node_to_station = self.node_to_station
+        node_to_place = self.node_to_place
+        set_from_station = ret_val.set_from_station
+        set_to_station = ret_val.set_to_station
         # Fill the mapping of from station costs.
-        for (station_id, places) in self.station_to_place.items():
-            for (place_id, distance) in places.items():
-                ret_val.set_from_station(self.node_to_station[station_id],
-                                         self.node_to_place[place_id], distance)
+        for (station_node, places) in self.station_to_place.items():
+            station_id = node_to_station[station_node]
+            for (place_node, distance) in places.items():
+                set_from_station(station_id, node_to_place[place_node], distance)
 
-        for (place_id, stations) in self.place_to_station.items():
-            for (station_id, distance) in stations.items():
-                ret_val.set_to_station(self.node_to_place[place_id],
-                                       self.node_to_station[station_id], distance)
+        for (place_node, stations) in self.place_to_station.items():
+            place_id = node_to_place[place_node]
+            for (station_node, distance) in stations.items():
+                set_to_station(place_id, node_to_station[station_node], distance)
 
         return ret_val
 
@@ -356,28 +358,21 @@ class LayoutGrpah:
         root = self.xml_tree.getroot()
         #self.xml_tree.write(USORTED_REFERENCE_LAYOUT_XML_FILE) # For debugging.
         waypoints = next(root.iter("Waypoints"))
+        node_to_place = self.node_to_place
         for waypoint in waypoints:
             ID = int(waypoint.attrib["ID"])
-            if ID in self.place_nodes:
-                if ID in place_to_pod.keys():
-                    waypoint.attrib["Pod"] = str(place_to_pod[ID])
-                else:
-                    waypoint.attrib["Pod"] = str(-1)
+            if ID in node_to_place:
+                waypoint.attrib["Pod"] = str(place_to_pod.get(ID, -1))
 
         # The pods have coordinates. They must be consistent with new places to.
         # We adjust the coordinates according to the mapping of place_to_pod.
         # Convert inverse mapping of busy places for faster access to the place coordinates.
-        pod_to_place = {}
-        for place_node_id, pod_id in place_to_pod.items():
-            if pod_id >= 0:
-                pod_to_place[pod_id] = place_node_id
+        pod_to_place = {pod_id: place_node_id for (place_node_id, pod_id) in place_to_pod.items() if pod_id >= 0}
 
+        positions = self.positions
         pods = next(root.iter("Pods"))
         for pod in pods:
-            pod_id = int(pod.attrib["ID"])
-            place_node_id = pod_to_place[pod_id]
-            x = self.graph.nodes[place_node_id]["x"]
-            y = self.graph.nodes[place_node_id]["y"]
+            (x, y) = positions[pod_to_place[int(pod.attrib["ID"])]]
             pod.attrib["X"] = str(x)
             pod.attrib["Y"] = str(y)
 
@@ -27,6 +27,12 @@ That means storage and loading functions for:
 """
 
 import json
+import numpy
+# orjson is optional. It parses and writes departures, solutions and costs faster than json.
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 import prp.core.objects as objects
 import prp.core.warehouse as warehouse_mod
@@ -52,7 +58,7 @@ class LayoutEncoder(json.JSONEncoder):
 def decode_state(o):
     """Help Json to convert plane dictionary data to corresponding python objects."""
     if all(key in o for key in ["T", "D", "PlaceToPod", "OutputStations", "NextPodMovement"]):
-        ret_val = warehouse_mod.Warehouse.MathematicalState
+        ret_val = warehouse_mod.Warehouse.MathematicalState()
         ret_val.t = o["T"]
         ret_val.total_costs = o["Costs"]
         ret_val.place_to_pod = o["PlaceToPod"]
@@ -120,31 +126,44 @@ def load_departures_from_json(f):
 
     :return determinstc departure generator when succeed and None on failure.
     """
+    if orjson is not None:
+        return DeterministicDepartures(orjson.loads(f.read()))
     return DeterministicDepartures(json.load(f))
 
 
+def _int_keys_dict(pairs):
+    """Return a dictionary of JSON key-value pairs with integer keys if all keys are numbers.
+
+    Json stores integer keys as strings. Converting them while the dictionary is built avoids a second pass like
+    :func:`convert_keys_to_int`.
+    """
+    try:
+        return {int(key): value for (key, value) in pairs}
+    except ValueError:
+        return dict(pairs)
+
+
+def _decode_object(pairs):
+    return _decode_state(_int_keys_dict(pairs))
+
+
 def _decode_state(o):
     """Help JSON to convert dictionary data to corresponding python objects."""
     if all(key in o for key in ["T", "Costs", "PlaceToPod", "OutputStations", "NextPodMovement"]):
         ret_val = warehouse_mod.Warehouse.MathematicalState()
         ret_val.t = o["T"]
         ret_val.total_costs = o["Costs"]
-        # Json will storage integer keys as strings. Repair them (convert them back to integers).
-        ret_val.place_to_pod = convert_keys_to_int(o["PlaceToPod"])
-        ret_val.output_stations = convert_keys_to_int(o["OutputStations"])
+        # The integer keys were already converted by _decode_object.
+        ret_val.place_to_pod = o["PlaceToPod"]
+        ret_val.output_stations = o["OutputStations"]
         ret_val.next_pod_movement = o["NextPodMovement"]
         return ret_val
     return o
 
 
 def _get_num_of_pods(math_state):
-    ret_val = 0
-    for (place_id, pod_id) in math_state.place_to_pod.items():
-        if pod_id > 0:
-            ret_val += 1
-    for (station_id, math_station_state) in math_state.output_stations.items():
-        ret_val += len(math_station_state)
-    return ret_val
+    return sum(pod_id > 0 for pod_id in math_state.place_to_pod.values()) + \
+        sum(map(len, math_state.output_stations.values()))
 
 
 def load_initial_state_from_json(f, warehouse: warehouse_mod.Warehouse):
@@ -163,7 +182,7 @@ def loads_initial_state_from_json_string(s, warehouse: warehouse_mod.Warehouse):
     :param warehouse: warehouse whose initial state must be set.
     """
     warehouse.delete_pods()
-    math_state = json.loads(s, object_hook=_decode_state)
+    math_state = json.loads(s, object_pairs_hook=_decode_object)
     # Add pods to warehouse.
     warehouse.set_num_pods(_get_num_of_pods(math_state))
     # assign pods to places or to stations
@@ -177,7 +196,7 @@ def loads_initial_state_from_json_string(s, warehouse: warehouse_mod.Warehouse):
 
     warehouse.t = math_state.t
     warehouse.total_costs = math_state.total_costs
-    warehouse.next_pod_movement = math_state.next_pod_movement  # possible I can ignore this.
+    # The next pod movement is not stored, the departure generator provides it.
 
 
 def store_initial_state_to_json(warehouse: warehouse_mod.Warehouse, f):
@@ -187,7 +206,15 @@ def store_initial_state_to_json(warehouse: warehouse_mod.Warehouse, f):
 
 
 def store_solution_to_json(solution, f):
-    """Store solution as a sequence of places to a JSON file."""
+    """Store solution as a sequence of places to a JSON file.
+
+    :param solution: list or numpy array of places.
+    """
+    if orjson is not None:
+        f.write(orjson.dumps(solution, option=orjson.OPT_SERIALIZE_NUMPY).decode())
+        return
+    if isinstance(solution, numpy.ndarray):
+        solution = solution.tolist()
     json.dump(solution, f)
 
 
@@ -196,6 +223,8 @@ def load_solution_from_json(f) -> list:
 
     :return solution as a list of actions.
     """
+    if orjson is not None:
+        return orjson.loads(f.read())
     return json.load(f)
 
 
@@ -211,31 +240,30 @@ class CostsEncoder(json.JSONEncoder):
 
 def store_costs_to_json(costs: costs_mod.Costs, f):
     """Store costs to a JSON file."""
-    if type(objects) != costs_mod.DictCosts:
+    if not isinstance(costs, costs_mod.DictCosts):
         costs = costs_mod.DictCosts(costs)
 
+    if orjson is not None:
+        # orjson writes the integer keys as strings like json, but it cannot use CostsEncoder.
+        f.write(orjson.dumps(CostsEncoder().default(costs), option=orjson.OPT_NON_STR_KEYS).decode())
+        return
     json.dump(costs, f, cls=CostsEncoder)
 
 
 def _decode_costs(o):
     """Convert dictionary read by JSON into DictCosts."""
     if all(key in o for key in ["NumStations", "NumPlaces", "ToStation", "FromStation"]):
-        ret_val = costs_mod.DictCosts()
+        ret_val = costs_mod.DictCosts(capacity=(o["NumStations"], o["NumPlaces"]))
         ret_val.set_num_stations(o["NumStations"])
         ret_val.set_num_places(o["NumPlaces"])
-        # Read to-station dictionary.
-        str_dict = o["ToStation"]
-        # Convert strings to integers keys and float numbers.
-        for (place_id, stations) in str_dict.items():
-            for (station_id, costs) in stations.items():
-                ret_val.set_to_station(int(place_id), int(station_id), float(costs))
-
-        # Read from-station dictionary.
-        str_dict = o["FromStation"]
-        # Convert strings to integers keys and float numbers.
-        for (station_id, places) in str_dict.items():
-            for (place_id, costs) in places.items():
-                ret_val.set_from_station(int(station_id), int(place_id), float(costs))
+        # DictCosts returns 0 for costs which are not set. Every station and place pair must be in the file.
+        num_pairs = o["NumStations"] * o["NumPlaces"]
+        if sum(map(len, o["ToStation"].values())) != num_pairs or \
+                sum(map(len, o["FromStation"].values())) != num_pairs:
+            raise ValueError("The costs of some stations and places are missing.")
+        # Read the dictionaries with string keys row by row.
+        ret_val.set_to_station_dict(o["ToStation"])
+        ret_val.set_from_station_dict(o["FromStation"])
 
         return ret_val
     return o
@@ -246,5 +274,30 @@ def load_costs_from_json(f) -> costs_mod.DictCosts:
 
     :param filename: path to the JSON file.
     """
+    if orjson is not None:
+        # The costs are the top level object, there is no need to check all nested objects like object_hook does.
+        return _decode_costs(orjson.loads(f.read()))
     costs = json.load(f, object_hook=_decode_costs)
     return costs
+
+
+def store_costs_to_npy(costs: costs_mod.Costs, f):
+    """Store costs to a numpy .npy file.
+
+    The file contains the from-station matrix and the transposed to-station matrix, see
+    :func:`prp.core.costs.get_cost_matrices`.
+
+    :param f: file stream opened in binary mode or a file name.
+    """
+    (from_station, to_station) = costs_mod.get_cost_matrices(costs)
+    numpy.save(f, numpy.stack([from_station, to_station.T]))
+
+
+def load_costs_from_npy(filename, mmap_mode='r') -> costs_mod.MatrixCosts:
+    """Load costs from a numpy .npy file.
+
+    :param filename: path to the .npy file.
+    :param mmap_mode: by default the file is memory mapped read-only. Use None to read the file into memory.
+    """
+    matrices = numpy.load(filename, mmap_mode=mmap_mode)
+    return costs_mod.MatrixCosts(matrices[0], matrices[1].T)
@@ -0,0 +1,52 @@
+# Pod Repositioning Problem
+# Copyright (C) 2017, 2018 Arbeitsgruppe OR an der Leuphana Universität Lüneburg
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Simulated annealing.
+
+The algorithm uses only the standard library. Together with a pure Python neighbor function it can be run with PyPy,
+whose tracing JIT compiles the loop without the compile time of numba.
+"""
+
+import math
+import random
+
+
+def simulated_annealing(solution, costs, neighbor, initial_temperature=1000.0, cooling_rate=0.95,
+                        markov_chain_length=100, min_temperature=1.0):
+    """Improve a solution with simulated annealing.
+
+    :param solution: initial solution.
+    :param costs: costs of the initial solution.
+    :param neighbor: function which returns a tuple (neighbor solution, its costs) for a solution.
+    :param initial_temperature: temperature at the beginning.
+    :param cooling_rate: the temperature is multiplied by the cooling rate after every markov chain.
+    :param markov_chain_length: number of neighbors per temperature.
+    :param min_temperature: stop when the temperature is not larger than this value.
+    :return: tuple (best solution, its costs).
+    """
+    (best_solution, best_costs) = (solution, costs)
+    (current_solution, current_costs) = (solution, costs)
+    temperature = initial_temperature
+    while temperature > min_temperature:
+        for _ in range(markov_chain_length):
+            (neighbor_solution, neighbor_costs) = neighbor(current_solution)
+            # Accept better neighbors always, worse neighbors with a probability which decreases with the temperature.
+            if neighbor_costs < current_costs or \
+                    random.random() < math.exp((current_costs - neighbor_costs) / temperature):
+                (current_solution, current_costs) = (neighbor_solution, neighbor_costs)
+                if current_costs < best_costs:
+                    (best_solution, best_costs) = (current_solution, current_costs)
+        temperature *= cooling_rate
+    return best_solution, best_costs
@@ -5,8 +5,10 @@
 18. April 2018.
 
 """
+import bisect
 import copy
 import logging
+from concurrent.futures import Future
 
 import pulp
 import prp.core.objects
@@ -29,6 +31,7 @@ class _IntervalSolver:
         # Calculate times when a place must be assigned. The pod is not allowed
         # to stay in the queue in the next time step.
         self.must_take_actions_T = self.calculate_action_times(self.occupations)
+        self._sorted_actions_T = sorted(self.must_take_actions_T)
         self.P = system.places
         self.costs = costs_mod.DictCosts(system.costs)
         self.reduce_overlapping_constraints = True
@@ -62,6 +65,11 @@ class _IntervalSolver:
         occupations = sorted(occupations, key=lambda oc: oc.begin)
         return occupations
 
+    def action_times(self, t_begin, t_end):
+        """Return the sorted list of action times in the interval [t_begin, t_end)."""
+        sorted_T = self._sorted_actions_T  # noqa: N806
+        return sorted_T[bisect.bisect_left(sorted_T, t_begin):bisect.bisect_left(sorted_T, t_end)]
+
     @staticmethod
     def calculate_action_times(occupations):
         """Define a set of time points when we need to select new place.
@@ -160,10 +168,7 @@ class _IntervalSolver:
 
     def _solve_partially(self, previous_results, t_begin, t_end, threads=None):
         # Determine current set of time to take an action.
-        curr_T = []  # noqa: N806
-        for t in range(t_begin, t_end):
-            if t in self.must_take_actions_T:
-                curr_T.append(t)
+        curr_T = self.action_times(t_begin, t_end)  # noqa: N806
 
         problem = pulp.LpProblem("Warehouse", pulp.LpMinimize)
 
@@ -193,16 +198,11 @@ class _IntervalSolver:
         logging.debug("BIG_M is %d" % BIG_M)
         logging.info("Adding \"Prevent storage time overlapping.\" constraints")
         constr_num = 0
-        # If upper cost bound is defined use it.
-        if self.upper_cost_bound is not None:
-            lhs = pulp.lpSum([cs[name] * x[name] for name in x.keys()])
-            rhs = self.upper_cost_bound
-            problem += lhs <= rhs
-            constr_num += 1
-
         # Count number of overapping constraints which may be skipped
         n_overlapping_skipped = 0
-        for t in curr_T:
+        for (i, t) in enumerate(curr_T):
+            # curr_T is sorted, the previous action times are the times in front of t.
+            previous_T = curr_T[:i]  # noqa: N806
             for p in self.P:
                 arrived_x_name = "x_%d_%d" % (t, p)
                 lhs = min(interval_B_init[p], t_end + 1)
@@ -214,9 +214,7 @@ class _IntervalSolver:
                 constr_num += 1
                 if constr_num % 100000 == 0:
                     logging.info("%d Prevent-overlapping constraints added." % constr_num)
-                for tau in range(min(curr_T), t):
-                    if tau not in curr_T:
-                        continue
+                for tau in previous_T:
                     previous_name = "x_%d_%d" % (tau, p)
                     if B[tau] <= t + 1 and self.reduce_overlapping_constraints:
                         n_overlapping_skipped += 1
@@ -230,6 +228,17 @@ class _IntervalSolver:
                     if constr_num % 100000 == 0:
                         logging.info("%d Prevent-overlapping constraints added." % constr_num)
 
+        # If upper cost bound is defined use it. The bound may still be calculated by a concurrent future,
+        # therefore wait for it only after all the other constraints are built.
+        upper_cost_bound = self.upper_cost_bound
+        if isinstance(upper_cost_bound, Future):
+            upper_cost_bound = upper_cost_bound.result()
+        if upper_cost_bound is not None:
+            lhs = pulp.lpSum([cs[name] * x[name] for name in x.keys()])
+            rhs = upper_cost_bound
+            problem += lhs <= rhs
+            constr_num += 1
+
         logging.info("Total constraints number: {}.".format(len(problem.constraints)))
         logging.info("{} overlapping constraints skipped.".format(n_overlapping_skipped))
 
@@ -256,10 +265,7 @@ class _IntervalSolver:
 
         logging.info("Count constraints only")
         # Detremine current set of instant to take an action.
-        curr_T = []  # noqa: N806
-        for t in range(t_begin, t_end):
-            if t in self.must_take_actions_T:
-                curr_T.append(t)
+        curr_T = self.action_times(t_begin, t_end)  # noqa: N806
 
         # Create a dictionary with variable names.
         # map names to (t,p) indices.
@@ -287,16 +293,15 @@ class _IntervalSolver:
         n_overlapping_skipped = 0
         n_overlapping_constraints = 0
         n_skipped_printed = n_overlapping_skipped
-        for t in curr_T:
+        for (i, t) in enumerate(curr_T):
             logging.info("t={}".format(t))
             # for p in self.P:
             nP = len(self.P)  # noqa: N806
             n_overlapping_constraints += nP
             if n_overlapping_constraints % 100000 == 0:
                 logging.info("%d Prevent-overlapping constraints added." % n_overlapping_constraints)
-            for tau in range(min(curr_T), t):
-                if tau not in curr_T:
-                    continue
+            # curr_T is sorted, the previous action times are the times in front of t.
+            for tau in curr_T[:i]:
                 if B[tau] <= t + 1 and self.reduce_overlapping_constraints:
                     n_overlapping_skipped += nP
                     continue
@@ -342,7 +347,11 @@ def solve_by_intervals(orgn_system, interval_length, end_t=None, threads=None, c
 
 
 def solve(orgn_system, max_t=None, threads=None, costs_upper_bound=None):
-    """Solve a warehouse prolem exactly with Binary Integer Programming (BIP)."""
+    """Solve a warehouse prolem exactly with Binary Integer Programming (BIP).
+
+    :param costs_upper_bound: optional upper bound of the total costs. It can also be a
+        :class:`concurrent.futures.Future`, then the bound is calculated while the BIP model is built.
+    """
     return solve_by_intervals(orgn_system, len(orgn_system.departure_generator), max_t, threads, costs_upper_bound)
 
 
@@ -5,10 +5,13 @@
 18. April 2018.
 
 """
+import hashlib
 import logging
+import os.path
 
 import gurobipy
 import prp.solvers.bip as bip
+from prp.core.costs import get_cost_matrices
 from datetime import datetime
 
 
@@ -25,6 +28,15 @@ class _IntervalSolver(bip._IntervalSolver):
         super(_IntervalSolver, self).__init__(orgn_system)
         self.callback = None  # Call this function when intermediate results are available.
 
+    def _problem_hash(self):
+        """Return a hash object of the data which the interval models are built from."""
+        problem_hash = hashlib.sha1()
+        problem_hash.update(repr((self.occupations, sorted(self.B_init.items()), list(self.P),
+                                  self.reduce_overlapping_constraints)).encode())
+        for matrix in get_cost_matrices(self.costs):
+            problem_hash.update(matrix.tobytes())
+        return problem_hash
+
     def get_decision_variables(self, model: gurobipy.Model, costs: gurobipy.tupledict):
         """Create variables with (t,p) indices."""
         x = model.addVars(costs.keys(), name="x", vtype=gurobipy.GRB.BINARY, obj=costs)
@@ -54,23 +66,13 @@ class _IntervalSolver(bip._IntervalSolver):
                 actions[t - t_begin] = p
         return actions
 
-    def _solve_partially(self, previous_results, t_begin, t_end, threads=None):
-        entry = {}
-        entry["StartTime"] = datetime.now()
-        entry["IntervalBegin"] = t_begin
-        entry["IntervalEnd"] = t_end
-        # Determine current set of time to take an action.
-        curr_T = []  # noqa: N806
-        for t in range(t_begin, t_end):
-            if t in self.must_take_actions_T:
-                curr_T.append(t)
+    def _build_model(self, t_begin, t_end, curr_T, costs, previous_results, entry):  # noqa: N803
+        """Create the BIP model of the interval [t_begin, t_end).
 
-        # Create model.
+        :return: tuple (model, decision variables).
+        """
         m = gurobipy.Model("storage")
-        costs = self.get_costs(t_end)
-
         x = self.get_decision_variables(m, costs=costs)
-
         logging.info("Number of decision variables: %d." % len(x))
         entry["AddConstraintsBegin"] = datetime.now()
         entry["PrepareTime"] = entry["AddConstraintsBegin"] - entry["StartTime"]
@@ -107,12 +109,11 @@ class _IntervalSolver(bip._IntervalSolver):
                 constr_num += 1
 
         nP = len(self.P)  # noqa: N806
-        for t in curr_T:
+        for (i, t) in enumerate(curr_T):
             if constr_num % 100000 == 0:
                 logging.info("%d Prevent-overlapping constraints added." % constr_num)
-            for tau in range(min(curr_T), t):
-                if tau not in curr_T:
-                    continue
+            # curr_T is sorted, the previous action times are the times in front of t.
+            for tau in curr_T[:i]:
                 if B[tau] <= t + 1 and self.reduce_overlapping_constraints:
                     n_overlapping_skipped += 1
                     continue
@@ -125,8 +126,41 @@ class _IntervalSolver(bip._IntervalSolver):
 
         logging.info("Total constraints number: {}.".format(constr_num))
         logging.info("{} overlapping constraints skipped.".format(n_overlapping_skipped))
+        return m, x
+
+    def _solve_partially(self, previous_results, t_begin, t_end, threads=None, model_file=None):
+        """Solve the decisions of the interval [t_begin, t_end).
+
+        :param model_file: If it is not None, read the model from this file if it exists and write the built model
+            to it otherwise. The file must be deleted if the problem changes.
+        """
+        entry = {}
+        entry["StartTime"] = datetime.now()
+        entry["IntervalBegin"] = t_begin
+        entry["IntervalEnd"] = t_end
+        # Determine current set of time to take an action.
+        curr_T = self.action_times(t_begin, t_end)  # noqa: N806
+
+        costs = self.get_costs(t_end)
+        if model_file is not None and os.path.exists(model_file):
+            logging.info("Reading model from {}.".format(model_file))
+            m = gurobipy.read(model_file)
+            # Find the decision variables by the names given in get_decision_variables.
+            x = gurobipy.tupledict(((t, p), m.getVarByName("x[{},{}]".format(t, p))) for (t, p) in costs.keys())
+            entry["AddConstraintsBegin"] = datetime.now()
+            entry["PrepareTime"] = entry["AddConstraintsBegin"] - entry["StartTime"]
+        else:
+            (m, x) = self._build_model(t_begin, t_end, curr_T, costs, previous_results, entry)
+            if model_file is not None:
+                m.write(model_file)
         entry["AddConstraintsStop"] = datetime.now()
         entry["AddConstraintsTime"] = entry["AddConstraintsStop"] - entry["AddConstraintsBegin"]
+
+        # Fix the solver configuration. Gurobi's parallel performance depends on it.
+        m.Params.Seed = 0
+        m.Params.Method = 2  # Barrier for the root relaxation.
+        m.Params.Threads = threads if threads is not None else os.cpu_count()
+
         logging.info("Solving problem...")
         m.optimize()
         solution = m.getAttr("x", x)
@@ -146,7 +180,7 @@ class _IntervalSolver(bip._IntervalSolver):
 
         return actions, m
 
-    def solve_by_intervals(self, interval_length, end_t=None, threads=None):
+    def solve_by_intervals(self, interval_length, end_t=None, threads=None, model_file=None):
         # If max_t was not specified then set it to a real max_t value.
         # keep max_t as small as possible because it will be used for
         # determining of big M values in the binary programming.
@@ -155,10 +189,17 @@ class _IntervalSolver(bip._IntervalSolver):
 
         Is = bip.get_intervals(self.t_init, end_t, interval_length)  # noqa: N806
         actions = []
+        problem_hash = self._problem_hash() if model_file is not None else None
         logging.info("Solving problem in intervals...")
         for I in Is:
+            interval_model_file = None
+            if model_file is not None:
+                # The model of an interval depends on the problem and on the decisions of the previous intervals.
+                interval_hash = problem_hash.copy()
+                interval_hash.update(str(actions).encode())
+                interval_model_file = "{}-{}-{}-{}.mps".format(model_file, I[0], I[1], interval_hash.hexdigest()[:16])
             (actions, model) = self._solve_partially(previous_results=actions, t_begin=I[0], t_end=I[1],
-                                                     threads=threads)
+                                                     threads=threads, model_file=interval_model_file)
             if model.status != gurobipy.GRB.OPTIMAL:
                 break
 
@@ -166,16 +207,26 @@ class _IntervalSolver(bip._IntervalSolver):
         return (actions, model)
 
 
-def solve_by_intervals(orgn_system, interval_length, end_t=None, threads=None, costs_upper_bound=None):
-    """Solve a warehouse prolem intervatively with BIP for every iteratively for every interval_length decisions."""
+def solve_by_intervals(orgn_system, interval_length, end_t=None, threads=None, costs_upper_bound=None,
+                       model_file=None):
+    """Solve a warehouse prolem intervatively with BIP for every iteratively for every interval_length decisions.
+
+    :param model_file: prefix of model cache files. The model of every interval is written to
+        "<model_file>-<begin>-<end>-<hash>.mps" and read from there in later runs. The hash belongs to the
+        occupations, the costs and the decisions of the previous intervals, which the model is built from.
+    """
     solver = _IntervalSolver(orgn_system)
     solver.upper_cost_bound = costs_upper_bound
-    return solver.solve_by_intervals(interval_length, end_t, threads)
+    return solver.solve_by_intervals(interval_length, end_t, threads, model_file)
+
 
+def solve(orgn_system, max_t=None, threads=None, costs_upper_bound=None, model_file=None):
+    """Solve a warehouse problem exactly with Binary Integer Programming (BIP).
 
-def solve(orgn_system, max_t=None, threads=None, costs_upper_bound=None):
-    """Solve a warehouse problem exactly with Binary Integer Programming (BIP)."""
-    return solve_by_intervals(orgn_system, len(orgn_system.departure_generator), max_t, threads, costs_upper_bound)
+    :param model_file: prefix of the model cache file, see :func:`solve_by_intervals`.
+    """
+    return solve_by_intervals(orgn_system, len(orgn_system.departure_generator), max_t, threads, costs_upper_bound,
+                              model_file)
 
 
 def count_constrains(orgn_system, max_t=None):
@@ -8,12 +8,92 @@
 1. September 2018.
 """
 
+import copy
 import random
 import pickle
+from operator import attrgetter
+import numpy
 import deap.algorithms
 import deap.tools as tools
 
 
+def cx_two_point_np(ind1, ind2):
+    """Execute a two-point crossover of two numpy.ndarray individuals in place.
+
+    This is :func:`deap.tools.cxTwoPoint` for numpy arrays. Slices of numpy arrays are views, therefore the swapped
+    parts must be copied.
+    """
+    size = min(len(ind1), len(ind2))
+    cxpoint1 = random.randint(1, size)
+    cxpoint2 = random.randint(1, size - 1)
+    if cxpoint2 >= cxpoint1:
+        cxpoint2 += 1
+    else:  # Swap the two cx points
+        cxpoint1, cxpoint2 = cxpoint2, cxpoint1
+
+    ind1[cxpoint1:cxpoint2], ind2[cxpoint1:cxpoint2] = \
+        ind2[cxpoint1:cxpoint2].copy(), ind1[cxpoint1:cxpoint2].copy()
+    return ind1, ind2
+
+
+def mut_uniform_int_np(individual, low, up, indpb):
+    """Replace genes of a numpy.ndarray individual by uniform random integers between low and up (inclusive).
+
+    This is :func:`deap.tools.mutUniformInt` for numpy arrays. Each gene is mutated with the probability indpb.
+    """
+    mask = numpy.random.random(len(individual)) < indpb
+    individual[mask] = numpy.random.randint(low, up + 1, numpy.count_nonzero(mask))
+    return individual,
+
+
+class FitnessStatistics:
+    """Replacement of :class:`deap.tools.Statistics` for single objective fitness values.
+
+    The fitness values of a population are copied once into a numpy array, all statistics are calculated from it.
+    The statistics are "Avg", "Std", "Min", "MinTotal" and "Max", where "MinTotal" is "Min" multiplied by
+    total_factor, for example by the number of time steps to get the total costs from average costs.
+    """
+
+    fields = ["Avg", "Std", "Min", "MinTotal", "Max"]
+
+    def __init__(self, total_factor=1):
+        self.total_factor = total_factor
+
+    def compile(self, population):
+        """Return a dictionary with statistics of the population."""
+        values = numpy.fromiter((ind.fitness.values[0] for ind in population), dtype=numpy.float64,
+                                count=len(population))
+        min_value = values.min()
+        return {"Avg": values.mean(), "Std": values.std(), "Min": min_value,
+                "MinTotal": min_value * self.total_factor, "Max": values.max()}
+
+
+class BestIndividual:
+    """Replacement of :class:`deap.tools.HallOfFame` with one individual.
+
+    It keeps a copy of the best individual seen so far. In contrast to the hall of fame it does not compare
+    individuals with each other, only their fitness.
+    """
+
+    def __init__(self):
+        self.items = []
+
+    def update(self, population):
+        """Replace the best individual if the population contains a better one."""
+        best = max(population, key=attrgetter("fitness"))
+        if not self.items or best.fitness > self.items[0].fitness:
+            self.items = [copy.deepcopy(best)]
+
+    def __getitem__(self, i):
+        return self.items[i]
+
+    def __len__(self):
+        return len(self.items)
+
+    def __str__(self):
+        return str(self.items)
+
+
 def min_fitness(population):
     """Determine minimal fitness of populataion.
 
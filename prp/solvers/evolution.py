@@ -20,6 +20,7 @@
 
 18. Juli 2018.
 """
+import prp.core.costs
 import prp.solvers.simple as simple
 from prp.stats import copy_warehouse
 
@@ -89,11 +90,6 @@ class Helper:
         return self.orgn_system.num_places
 
     def calculate_infeasible_costs(self):
-        max_to_station = 0.0
-        max_from_station = 0.0
-        for station_id in self.orgn_system.stations.keys():
-            for place_id in self.orgn_system.places:
-                max_to_station = max(max_to_station, self.orgn_costs.to_station(place_id, station_id))
-                max_from_station = max(max_from_station, self.orgn_costs.from_station(station_id, place_id))
-
+        (max_from_station, max_to_station) = prp.core.costs.max_costs(
+            self.orgn_costs, self.orgn_system.stations.keys(), self.orgn_system.places)
         return 10 * (max_to_station + max_from_station)
@@ -22,11 +22,13 @@ to some fix order. If the index is larger than there are free places we take mod
 18. Juli 2018.
 """
 import copy
+import numpy
 import prp.core.objects
 from prp.core.objects import INVALID_ID
 import prp.stats
 import prp.core.costs
 import prp.xy
+import prp.kernels as kernels
 from prp.stats import copy_warehouse
 from prp.solvers.simple import PlaybackSolver, RandomSolver, CheapestPlaceSolver, CostsType
 
@@ -113,10 +115,31 @@ class Helper:
         self.orgn_system = system
         self.place_order = place_order
         self.infeasible_costs = self._calculate_infeasible_costs()
+        # Arrays for the compiled evaluation.
+        self._state = kernels.get_state_arrays(system)
+        self._departures = numpy.array(system.departure_generator.departures, dtype=numpy.int32)
+        self._place_order = numpy.array(place_order, dtype=numpy.int32)
+        (self._from_station, self._to_station) = prp.core.costs.get_cost_matrices(
+            system.costs, station_ids=system.stations.keys(), place_ids=system.places)
 
     def evaluate(self, individual)->float:
         """Return average costs of the system solved with information in individual.
 
+        The system is simulated by :func:`prp.kernels.evaluate_ordered`, :meth:`evaluate_slow` gives the same
+        results with the warehouse object.
+
+        :param individual: sequence of indices of free places.
+        """
+        costs = kernels.evaluate_ordered(numpy.asarray(individual, dtype=numpy.int64), self._place_order,
+                                         *[a.copy() for a in self._state], self._departures,
+                                         self._from_station, self._to_station)
+        if costs == numpy.inf:
+            return (self.infeasible_costs,)
+        return (costs,)
+
+    def evaluate_slow(self, individual)->float:
+        """Return average costs of the system solved with information in individual.
+
         :param individual: sequence of indices of free places.
         """
         warehouse = copy_warehouse(self.orgn_system, deep_copy_costs=False)
@@ -181,11 +204,6 @@ class Helper:
         return 100000000
 
     def _calculate_infeasible_costs(self):
-        max_to_station = 0.0
-        max_from_station = 0.0
-        for station_id in self.orgn_system.stations.keys():
-            for place_id in self.orgn_system.places:
-                max_to_station = max(max_to_station, self.orgn_system.costs.to_station(place_id, station_id))
-                max_from_station = max(max_from_station, self.orgn_system.costs.from_station(station_id, place_id))
-
+        (max_from_station, max_to_station) = prp.core.costs.max_costs(
+            self.orgn_system.costs, self.orgn_system.stations.keys(), self.orgn_system.places)
         return 10 * (max_to_station + max_from_station)
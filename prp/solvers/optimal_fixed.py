@@ -70,7 +70,7 @@ class _DetermineOptimal:
         # Fill station occurencies.
         for occupation in occupations:
             st_id = occupation.from_station_id
-            if st_id is not INVALID_ID:
+            if st_id != INVALID_ID:
                 res[occupation.pod_id][st_id] += 1
         return res
 
@@ -79,7 +79,7 @@ class _DetermineOptimal:
         # Fill station occurrences.
         for occupation in occupations:
             st_id = occupation.to_station_id
-            if st_id is not INVALID_ID:
+            if st_id != INVALID_ID:
                 res[occupation.pod_id][st_id] += 1
         return res
 
@@ -172,7 +172,7 @@ def _get_average_place_costs(station_frequnces, costs):
         w[fid] = f / n
 
     avg_costs = prp.core.costs.AverageCosts(costs, w)
-    return avg_costs.average_mapping
+    return {place_id: avg_costs.average_mapping[place_id] for place_id in avg_costs.place_ids}
 
 
 def _get_sorted_places(station_frequencies, costs):
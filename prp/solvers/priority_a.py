@@ -21,9 +21,10 @@
 """
 
 from collections import namedtuple
-import copy
+import numpy
 import prp.core.warehouse as warehouse_mod
 from prp.core.objects import INVALID_ID
+from prp.core.costs import get_cost_matrices
 
 DEFAULT_PRIORITY_FACTOR = 1.00001
 
@@ -43,6 +44,9 @@ class Solver:
             self.pod_frequencies[pod_id] = 0
 
         self.priority_factor = DEFAULT_PRIORITY_FACTOR
+        # Evaluate the costs once. The places are the columns of from_station and the rows of to_station.
+        (self._from_station, self._to_station) = get_cost_matrices(
+            warehouse.costs, station_ids=warehouse.stations.keys(), place_ids=warehouse.places)
 
     def estimate_station_weights(self):
         """Use saved frequencies to estimate probability for the next station.
@@ -77,6 +81,16 @@ class Solver:
             result += self.warehouse.costs.to_station(to_place, id) * w
         return result
 
+    def all_place_costs(self, from_station_id, station_weights):
+        """Return :meth:`place_costs` of all places as a list indexed by place IDs.
+
+        The costs are summed up in the same order as in :meth:`place_costs`, the results are equal.
+        """
+        result = self._from_station[from_station_id].copy()
+        for (id, w) in station_weights.items():
+            result += self._to_station[:, id] * w
+        return result.tolist()
+
     def get_available_places(self, from_station_id, to_station_id=None):
         """Create lists of places sorted by costs. The cheapest costs are in the beginning.
 
@@ -90,14 +104,9 @@ class Solver:
             # Set weight of the known station to 1 and all the others to 0.
             station_w = self.get_deterministic_station_weights(to_station_id)
 
-        # Estimate costs for all free places
-        CostsEntry = namedtuple('CostsEntry', ['place_id', 'costs'])
-        entries = []
-        for place_id in self.warehouse.available_places:
-            entries.append(CostsEntry(place_id=place_id, costs=self.place_costs(from_station_id, place_id, station_w)))
-        # Sort costs. Cheaper costs are in the front.
-        entries = sorted(entries, key=lambda x: x.costs)
-        return [x.place_id for x in entries]
+        # Estimate costs for all places and sort the free places by them. Cheaper costs are in the front.
+        costs = self.all_place_costs(from_station_id, station_w)
+        return sorted(self.warehouse.available_places, key=lambda x: costs[x])
 
     def estimate_future_usage(self, pod_id):
         return self.pod_frequencies[pod_id]
@@ -112,15 +121,24 @@ class Solver:
                            self.warehouse.costs.to_station(place_id, station_id))
         return result
 
+    def all_average_costs(self):
+        """Return :meth:`average_costs` of all places as a list indexed by place IDs."""
+        station_weights = self.estimate_station_weights()
+        result = numpy.zeros(self._from_station.shape[1])
+        for (station_id, w) in station_weights.items():
+            result += w * (self._from_station[station_id] + self._to_station[:, station_id])
+        return result.tolist()
+
     # This is the faster non-recursive version than the recursive version in pseudo-code.
     def want_to_change(self, pods, available_places):
         """Return pods sorted by priority how want to have availabe places.
 
         High priority first.
         """
-        available_places = copy.copy(available_places)
+        # The station weights do not change here, evaluate the average costs of all places once.
+        avg_costs = self.all_average_costs()
         # Sort places by average costs.
-        available_places = sorted(available_places, key=lambda x: self.average_costs(x))
+        available_places = sorted(available_places, key=lambda x: avg_costs[x])
         result = []
         for pod_id in pods:
             # Only remove pods in storage area.
@@ -128,7 +146,7 @@ class Solver:
             if place_id is not None:
                 # Check if the pod is happy with its own current place.
                 if available_places:
-                    if self.average_costs(place_id) > self.average_costs(available_places[0]):
+                    if avg_costs[place_id] > avg_costs[available_places[0]]:
                         # This pod prefers to move to the other place.
                         result.append(pod_id)
                         available_places.pop(0)
@@ -22,8 +22,10 @@
 
 from collections import namedtuple
 import copy
+import numpy
 import prp.core.warehouse as warehouse_mod
 from prp.core.objects import INVALID_ID
+from prp.core.costs import get_cost_matrices
 from prp.core.departure_generators import DeterministicDepartures
 from prp.solvers.priority_a import DEFAULT_PRIORITY_FACTOR
 
@@ -49,6 +51,16 @@ class KnownData:
         for station_id in station_ids:
             self.departures_by_station[station_id] = []
 
+        # Split the departures by stations once. For every station keep the departure indices and the pods
+        # in the order of time. A window of departures is then a slice of these arrays.
+        departures = numpy.array(self._all_departures, dtype=numpy.int32).reshape(-1, 2)
+        self._indices_by_station = {}
+        self._pods_by_station = {}
+        for station_id in station_ids:
+            indices = numpy.flatnonzero(departures[:, 1] == station_id)
+            self._indices_by_station[station_id] = indices
+            self._pods_by_station[station_id] = departures[indices, 0]
+
     def update_data(self, warehouse: warehouse_mod.Warehouse, ndepartures: int):
         """Update station lists."""
         added_departures = 0
@@ -59,20 +71,17 @@ class KnownData:
         for (station_id, station) in warehouse.stations.items():
             if added_departures >= ndepartures:
                 break
-            for pod_id in station.state:
-                self.departures_by_station[station_id].append(pod_id)
-                added_departures += 1
+            self.departures_by_station[station_id].extend(station.state)
+            added_departures += len(station.state)
 
         # Add remaining departures.
         begin_index = warehouse.t - self.begin_t
         end_index = min(begin_index + ndepartures - added_departures, len(self._all_departures))
-        try:
-            for i in range(begin_index, end_index):
-                task = self._all_departures[i]
-                self.departures_by_station[task[1]].append(task[0])
-        except TypeError:
-            print(begin_index)
-            print(end_index)
+        if end_index <= begin_index:
+            return
+        for (station_id, indices) in self._indices_by_station.items():
+            (lo, hi) = numpy.searchsorted(indices, (begin_index, end_index))
+            self.departures_by_station[station_id].extend(self._pods_by_station[station_id][lo:hi].tolist())
 
 
 Departure = namedtuple("Departure", ["t", "pod_id", "station_id"])
@@ -113,6 +122,9 @@ class Solver:
         self.station_dep = {}  # Departures from station relatively to the beginning of the 0-th service.
         self.use_unknown_frequencies = True
         self.priority_factor = DEFAULT_PRIORITY_FACTOR
+        # Evaluate the costs once. The places are the columns of from_station and the rows of to_station.
+        (self._from_station, self._to_station) = get_cost_matrices(
+            warehouse.costs, station_ids=warehouse.stations.keys(), place_ids=warehouse.places)
 
     def get_service_times(self, current_station):
         """Return estimation of inter-departure times rescaled by sum of the service times."""
@@ -208,6 +220,13 @@ class Solver:
             result += self.warehouse.costs.to_station(to_place, id) * w
         return result
 
+    def all_place_costs(self, from_station_id, station_weights):
+        """Return :meth:`place_costs` of all places as a list indexed by place IDs."""
+        result = self._from_station[from_station_id].copy()
+        for (id, w) in station_weights.items():
+            result += self._to_station[:, id] * w
+        return result.tolist()
+
     # Similar to A, but in addition to historical values it uses future valuese..
     def estimate_station_weights(self):
         """Use saved frequencies to estimate probability for the next station.
@@ -280,14 +299,9 @@ class Solver:
             # Set weight of the known station to 1 and all the others to 0.
             station_w = self.get_deterministic_station_weights(to_station_id)
 
-        # Estimate costs for all free places
-        CostsEntry = namedtuple('CostsEntry', ['place_id', 'costs'])
-        entries = []
-        for place_id in self.warehouse.available_places:
-            entries.append(CostsEntry(place_id=place_id, costs=self.place_costs(from_station_id, place_id, station_w)))
-        # Sort costs. Cheaper costs are in the front.
-        entries = sorted(entries, key=lambda x: x.costs)
-        return [x.place_id for x in entries]
+        # Estimate costs for all places and sort the free places by them. Cheaper costs are in the front.
+        costs = self.all_place_costs(from_station_id, station_w)
+        return sorted(self.warehouse.available_places, key=lambda x: costs[x])
 
     def decide_new_place(self):
         """Decide new place."""
@@ -319,6 +333,14 @@ class Solver:
                            self.warehouse.costs.to_station(place_id, station_id))
         return result
 
+    def all_average_costs(self):
+        """Return :meth:`average_costs` of all places as a list indexed by place IDs."""
+        station_weights = self.estimate_station_weights()
+        result = numpy.zeros(self._from_station.shape[1])
+        for (station_id, w) in station_weights.items():
+            result += w * (self._from_station[station_id] + self._to_station[:, station_id])
+        return result.tolist()
+
     # Estimated costs
     def estimated_costs(self, from_station, place_id, to_station):
         """Estimate costs of a place by probability of the future stations."""
@@ -339,11 +361,32 @@ class Solver:
 
         return result
 
+    def all_estimated_costs(self, from_station, to_station):
+        """Return :meth:`estimated_costs` of all places as a list indexed by place IDs.
+
+        The costs are summed up in the same order as in :meth:`estimated_costs`, the results are equal.
+        """
+        station_weights = self.estimate_station_weights()
+        if from_station != INVALID_ID:
+            result = self._from_station[from_station].copy()
+        else:
+            result = numpy.zeros(self._from_station.shape[1])
+            for (station_id, w) in station_weights.items():
+                result += w * self._from_station[station_id]
+
+        if to_station != INVALID_ID:
+            result += self._to_station[:, to_station]
+        else:
+            for (station_id, w) in station_weights.items():
+                result += w * self._to_station[:, station_id]
+
+        return result.tolist()
+
     # Do not forget to change it to a real estimator later.
     def estimate_from_station(self, pod):
         # Use queue information
         for _id, station in self.warehouse.stations.items():
-            if pod in station.state:
+            if pod in station:
                 return _id
 
         # Use perfect guess for experimental purpose first.
@@ -369,11 +412,12 @@ class Solver:
         place_id = self.warehouse.place_by_pod(pod)
         from_station_id = self.estimate_from_station(pod)
         to_station_id = self.estimate_to_station(pod)
+        costs = self.all_estimated_costs(from_station_id, to_station_id)
 
         if place_id is None:
             best_costs = float("Inf")
         else:
-            best_costs = self.estimated_costs(from_station_id, place_id, to_station_id)
+            best_costs = costs[place_id]
 
         best_place = INVALID_ID
 #        index = 0  # Used for log only
@@ -381,7 +425,7 @@ class Solver:
             #            avg_costs = self.estimated_costs(INVALID_ID, place_id, INVALID_ID)
             #            avg_costs2 = self.average_costs(place_id)
 
-            other_costs = self.estimated_costs(from_station_id, place_id, to_station_id)
+            other_costs = costs[place_id]
             if other_costs < best_costs:
                 best_place = place_id
                 best_costs = other_costs
@@ -397,7 +441,8 @@ class Solver:
         """
         available_places = copy.copy(available_places)
         # The next line only required for statistical purpose. It can be removed later
-        available_places = sorted(available_places, key=lambda x: self.average_costs(x))
+        avg_costs = self.all_average_costs()
+        available_places = sorted(available_places, key=lambda x: avg_costs[x])
         result = []
         for pod in pods:
             better_place = self.pod_wants_to_change(pod, available_places)
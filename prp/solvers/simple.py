@@ -20,12 +20,12 @@
 27. June 2018.
 """
 
-import math
 import random
 from enum import Enum
 import numpy as np
 import prp.core.warehouse as system_mod
 from prp.core.objects import INVALID_ID, Costs
+from prp.core.costs import get_cost_matrices
 
 
 class PlaybackSolver:
@@ -74,6 +74,19 @@ class CheapestPlaceSolver:
         else:
             self.costs = costs
         self.costs_type = costs_type
+        # Evaluate the costs once. The places are the columns of from_station and the rows of to_station.
+        (self.from_station, self.to_station) = get_cost_matrices(self.costs, station_ids=warehouse.stations.keys(),
+                                                                  place_ids=warehouse.places)
+        # Places of every station sorted by costs, once with the costs from the station only and once with the
+        # costs to the storage and back to the station. The stable sort keeps places with equal costs in the order
+        # of their IDs. Column and row 0 belong to INVALID_ID and are not places.
+        self._places_by_from_costs = {}
+        self._places_by_decision_costs = {}
+        for station_id in range(1, self.from_station.shape[0]):
+            from_costs = self.from_station[station_id, 1:]
+            decision_costs = from_costs + self.to_station[1:, station_id]
+            self._places_by_from_costs[station_id] = (np.argsort(from_costs, kind='stable') + 1).tolist()
+            self._places_by_decision_costs[station_id] = (np.argsort(decision_costs, kind='stable') + 1).tolist()
 
     def decide_new_place(self):
         """Put the pod to the cheapest available place."""
@@ -83,19 +96,21 @@ class CheapestPlaceSolver:
             costs_so_far = 0
             return INVALID_ID,pod, station_id
 
-        cheapest_place_so_far = INVALID_ID
-        costs_so_far = math.inf
-        
-        for place_id in self.warehouse.available_places:            
-            curr_costs = self.costs.from_station(station_id, place_id)
-            if self.costs_type == CostsType.DECISION:
-                next_station = self.next_station(pod)
-                if next_station != INVALID_ID:
-                    curr_costs += self.costs.to_station(place_id, station_id)
-
-            if curr_costs < costs_so_far:
-                cheapest_place_so_far = place_id
-                costs_so_far = curr_costs
+        places = self._places_by_from_costs[station_id]
+        if self.costs_type == CostsType.DECISION:
+            next_station = self.next_station(pod)
+            if next_station != INVALID_ID:
+                places = self._places_by_decision_costs[station_id]
+
+        # Take the first available place in the order of costs. If no place is available, take INVALID_ID.
+        # Available are the free places and the place of the pod, which departs in this step.
+        place_to_pod = self.warehouse.place_to_pod
+        departing_place = INVALID_ID
+        if len(self.warehouse.departure_generator) > 0:
+            departing_place = self.warehouse.place_by_pod(self.warehouse.departure_generator.current()[0])
+        cheapest_place_so_far = next((place_id for place_id in places
+                                      if place_to_pod[place_id] == INVALID_ID or place_id == departing_place),
+                                     INVALID_ID)
         if self.verbatim:
             print("Pod {} from {} arrives to place {} at {}.".format(
                 pod, station_id, cheapest_place_so_far, self.warehouse.t + 1))
@@ -128,12 +143,10 @@ class SomePlaceSolver:
     def decide_new_place(self, pod: int = None, station_id: int = None):
         (pod, _) = self.system.next_arrival_to_storage()
         if pod != INVALID_ID:
-            for place_id in self.system.places:
-                # If the place is busy, ignore it.
-                if not self.system.place_is_free(place_id):
-                    continue
-
-                # Free place found.
+            free_places = self.system.place_to_pod.free_places
+            if free_places:
+                # Free place found. The free places are sorted, the first one has the smallest ID.
+                place_id = free_places[0]
                 if self.verbatim:
                     print("Pod {} arrives to place {} at {}.".format(pod, place_id, self.system.t + 1))
                 return place_id, pod, station_id
@@ -325,7 +325,7 @@ def rearange_occupation_table(occupation_table, place_ids, cost_func, pod_priori
 def _frequency_priority(occupations):
     """Sort occupation by pod frequencies priority and time."""
     pod_priorities = _calc_pod_priporities_by_frequency(occupations)
-    logging.debug("Pod priorities:\n{}".format(pod_priorities))
+    logging.debug("Pod priorities:\n%s", pod_priorities)
 
     # First create mapping from a sequence pod_priorities to a dictionary
     # pod->priority. Higher number means higher priority.
@@ -358,7 +358,7 @@ def get_cost_function(warehouse, costs_type=CostsType.DECISION):
     elif costs_type.value is CostsType.DECISION.value:
         def cost_func(from_station, place, to_station):
             res = warehouse.costs.from_station(from_station, place)
-            if to_station is not INVALID_ID:
+            if to_station != INVALID_ID:
                 res += warehouse.costs.to_station(place, to_station)
             return res
     else:
@@ -32,7 +32,7 @@ import copy
 from prp.core.costs import ZeroCosts
 
 Occupation = namedtuple('Occupation', ['place_id', 'pod_id', 'begin', 'end',
-                                       'span', 'from_station_id', 'to_station_id'], verbose=False)
+                                       'span', 'from_station_id', 'to_station_id'])
 
 
 def copy_warehouse(warehouse: warehouse_mod.Warehouse, deep_copy_costs=True):
@@ -81,7 +81,7 @@ def get_occupations(warehouse: warehouse_mod.Warehouse, solver = None, do_not_co
         (_, from_station) = warehouse.next_arrival_to_storage()
 
         # Add finished occupation interval to intervals.
-        if from_place is not INVALID_ID:
+        if from_place != INVALID_ID:
             interval = current_interval[from_place]
             interval[1] = warehouse.t + 1  # Note. The pod from this place will leave only in the next time step.
             occupations.append(Occupation(place_id=from_place, pod_id=to_station_pod, begin=interval[0],
@@ -154,5 +154,5 @@ def get_marginal_frequencies(task_generator: warehouse_mod.DepartureGenerator):
         else:
             station_usage[station_id] += 1
 
-    DepartureStats = namedtuple('DepartureStats', ['pod_usage', 'station_usage'], verbose=False)
+    DepartureStats = namedtuple('DepartureStats', ['pod_usage', 'station_usage'])
     return DepartureStats(pod_usage=pod_usage, station_usage=station_usage)
@@ -19,7 +19,19 @@
 
 25 Juni 2018
 """
+import functools
 import os.path
+import pickle
+
+import prp.core.costs
+import prp.core.departure_generators
+import prp.core.objects
+import prp.core.warehouse
+import prp.xy
+
+# Source files of the objects in a pickled warehouse. A cached warehouse is outdated if one of them is newer.
+WAREHOUSE_SOURCES = tuple(module.__file__ for module in (prp.core.costs, prp.core.departure_generators,
+                                                         prp.core.objects, prp.core.warehouse, prp.xy))
 
 
 def create_missing_directories_of_file(file_path):
@@ -47,3 +59,30 @@ def create_directories(path):
     if not os.path.exists(parent):
         create_directories(parent)  # Create all the previous directory.
     os.makedirs(path)  # Make a new directory
+
+
+@functools.lru_cache(maxsize=None)
+def _load_pickled_warehouse(cache_file, parse, input_files) -> bytes:
+    """Return the pickled warehouse. Use the cache file if it is up to date."""
+    if os.path.exists(cache_file) and \
+            os.path.getmtime(cache_file) >= max(os.path.getmtime(f) for f in input_files + WAREHOUSE_SOURCES):
+        with open(cache_file, 'rb') as infile:
+            return infile.read()
+
+    data = pickle.dumps(parse(*input_files), protocol=pickle.HIGHEST_PROTOCOL)
+    create_missing_directories_of_file(cache_file)
+    with open(cache_file, 'wb') as outfile:
+        outfile.write(data)
+    return data
+
+
+def load_cached_warehouse(cache_file, parse, *input_files):
+    """Load a warehouse with parse(*input_files) only once.
+
+    The warehouse is pickled to cache_file and reused as long as the cache file is newer than the input files and
+    the modules of the pickled objects. Within a process the pickled data is kept in memory as well.
+
+    :param parse: function which loads the warehouse from the input files.
+    :return: a new warehouse object on every call.
+    """
+    return pickle.loads(_load_pickled_warehouse(cache_file, parse, input_files))
@@ -20,7 +20,6 @@
 25 November 2017
 """
 
-import copy
 from collections import namedtuple
 import json
 import numpy
@@ -244,26 +243,22 @@ class Layout:
         The to station costs is Manhattan distance to station tail + the lengths of the station.
         From station costs are costs from the station head.
         """
-        ret_val = costs.DictCosts()
+        ret_val = costs.DictCosts(capacity=(len(self.stations), len(self.places)))
         # Set functions' domain.
-        ret_val._station_ids = copy.copy(list(self.stations.keys()))
-        ret_val._place_ids = copy.copy(list(self.places.keys()))
+        ret_val.set_num_stations(len(self.stations))
+        ret_val.set_num_places(len(self.places))
         # Fill the mapping of from station costs.
         for (station_id, station) in self.stations.items():
             from_coord = station.segments[0]
-            ret_val.from_station_dict[station_id] = {}
             for (place_id, place) in self.places.items():
                 d = from_coord.distance(place.coord)
-                ret_val.from_station_dict[station_id][place_id] = d
+                ret_val.set_from_station(station_id, place_id, d)
         # Fill the mapping from place to stations.
         for (place_id, place) in self.places.items():
-            ret_val.to_station_dict[place_id] = {}
             for (station_id, station) in self.stations.items():
                 d = place.coord.distance(station.segments[-1])
                 additional_d = station.max_n - 1
-                ret_val.to_station_dict[place_id][station_id] = d + additional_d
-        ret_val.num_places = len(self.places)
-        ret_val.num_stations = len(self.stations)
+                ret_val.set_to_station(place_id, station_id, d + additional_d)
 
         return ret_val
 
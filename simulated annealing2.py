@@ -34,6 +34,8 @@ def load_problem():
 
 # Initial solution
 warehouse = load_problem()
+# Cost matrices indexed by IDs, row and column 0 belong to INVALID_ID.
+from_station_mat, to_station_mat = costs_mod.get_cost_matrices(warehouse.costs, dtype=np.int32)
 # endregion
 
 # Select solver
@@ -44,18 +46,26 @@ solver2 = RandomSolver(warehouse)
 iterations = 1000
 x = 0
 solution = []
-costs = np.empty(iterations, dtype=int)
+costs = np.zeros(iterations, dtype=int)
+# Pods which leave a station and the stations they leave, per time step. They do not depend on the solution.
+pod_seq = np.zeros(iterations, dtype=int)
+station_seq = np.zeros(iterations, dtype=int)
 pod_location = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
 Original_Configuration = np.empty((iterations, 10), dtype=int)
 Next_Configuration = np.empty((iterations, 10), dtype=int)
 Original_Configuration[x] = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
 
+# State before the initial solution. Neighbor solutions start from it.
+initial_state = warehouse.snapshot()
+
 # region initial solution with cheapest place    
 while not warehouse.finished():
     place_id, pod, station_id = solver.decide_new_place()
     solution.append(place_id)
     
     # Store movements in arrays in order to use in heuristic
+    pod_seq[x] = pod
+    station_seq[x] = station_id
     previous_location = pod_location[pod - 1]
     Next_Configuration[x] = Original_Configuration[x]
     Next_Configuration[x][previous_location - 1] = 0
@@ -64,7 +74,7 @@ while not warehouse.finished():
     
     # Can only store costs if a movement is made
     if place_id != 0 and previous_location != 0:
-        costs[x] = warehouse.costs.from_station(station_id, place_id) + warehouse.costs.to_station(previous_location, station_id)
+        costs[x] = from_station_mat[station_id, place_id] + to_station_mat[previous_location, station_id]
    
     # Cannot store configurations in the last iteration
     if x != iterations - 1:
@@ -73,12 +83,29 @@ while not warehouse.finished():
     warehouse.next(place_id)
 # endregion
 
-def generate_neighbor_solution(solution):
+def generate_neighbor_solution(solution, solution_costs):
+    """Change the solution from a random index on and return the new solution, its step costs and total costs.
+
+    The step costs before the random index are the same as those of the solution, only the remaining ones are
+    calculated.
+    """
+    state = warehouse.snapshot()
     warehouse2 = warehouse
     randomindex = np.random.randint(len(solution))
     newsolution = solution[:randomindex]
+    # Replay the kept part of the solution.
+    warehouse2.restore(initial_state)
+    for place_id in newsolution:
+        warehouse2.next(place_id)
     firstpass = True
-    newcosts = np.empty(iterations, dtype=int)
+    newcosts = np.zeros(iterations, dtype=int)
+    newcosts[:randomindex] = solution_costs[:randomindex]
+
+    # Pod locations at the random index.
+    local_pod_location = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    for i in range(randomindex):
+        if solution[i] != 0:
+            local_pod_location[pod_seq[i] - 1] = solution[i]
 
     x = randomindex 
     while len(newsolution) <= iterations - 1:
@@ -90,8 +117,10 @@ def generate_neighbor_solution(solution):
 
         newsolution.append(place_id)
         # Can only store costs if a movement is made
+        previous_location = local_pod_location[pod - 1]
         if place_id != 0 and previous_location != 0:
-            newcosts[x] = warehouse2.costs.from_station(station_id, place_id) + warehouse2.costs.to_station(previous_location, station_id)
+            newcosts[x] = from_station_mat[station_id, place_id] + to_station_mat[previous_location, station_id]
+            local_pod_location[pod - 1] = place_id
 
         # Cannot store configurations in the last iteration
         if x != iterations - 1:
@@ -99,7 +128,8 @@ def generate_neighbor_solution(solution):
         x += 1
         warehouse2.next(place_id)
     newcostssom = np.sum(newcosts)
-    return newsolution, newcostssom
+    warehouse.restore(state)
+    return newsolution, newcosts, newcostssom
 
 # Simulated annealing parameters
 initial_temperature = 1000
@@ -112,14 +142,16 @@ current_temp = initial_temperature
 best_solution = solution
 best_cost = np.sum(costs)
 current_solution = solution
+current_costs = costs
 current_cost = best_cost
 
 while current_temp > min_temp:
     for i in range(markov_chain_length):
-        neighbor_solution, neighbor_cost = generate_neighbor_solution(current_solution)
+        neighbor_solution, neighbor_costs, neighbor_cost = generate_neighbor_solution(current_solution, current_costs)
         
         if neighbor_cost < current_cost:
             current_solution = neighbor_solution
+            current_costs = neighbor_costs
             current_cost = neighbor_cost
             if neighbor_cost < best_cost:
                 best_solution = neighbor_solution
@@ -129,6 +161,7 @@ while current_temp > min_temp:
             r = np.random.random()
             if r < np.exp((current_cost - neighbor_cost) / current_temp):
                 current_solution = neighbor_solution
+                current_costs = neighbor_costs
                 current_cost = neighbor_cost
 
     current_temp = current_temp * cooling_rate
@@ -34,6 +34,8 @@ def load_problem():
 
 #initial solution
 warehouse = load_problem()
+#cost matrices indexed by IDs, row and column 0 belong to INVALID_ID
+from_station_mat, to_station_mat = costs_mod.get_cost_matrices(warehouse.costs, dtype=np.int32)
 #endregion
 
 #select solver
@@ -65,7 +67,7 @@ while not warehouse.finished():
     
     #can only store costs if a movement is made
     if place_id != 0 and previous_location != 0:
-        costs[x]= warehouse.costs.from_station(station_id, place_id)+ warehouse.costs.to_station(previous_location, station_id)
+        costs[x]= from_station_mat[station_id, place_id]+ to_station_mat[previous_location, station_id]
    
     #cannot store configurations in the last iteration
     if x != iterations-1:
@@ -90,7 +92,7 @@ def generateneighborsolution(solution):
             newcost.append(0)
 
         newsolution.append(place_id)                                                        #Add new place_id to solution list
-        newcost[x]= warehouse.costs.from_station(station_id, place_id)+ warehouse.costs.to_station(previous_location, station_id)
+        newcost[x]= from_station_mat[station_id, place_id]+ to_station_mat[previous_location, station_id]
         x += 1
 
     total_new_cost = sum(newcost) 
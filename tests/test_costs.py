@@ -22,7 +22,9 @@
 import sys
 sys.path.append('../src')
 import unittest
+import numpy
 import core.costs as costs_mod
+import prp.core.objects as objects
 
 
 class TestCosts(unittest.TestCase):
@@ -36,6 +38,23 @@ class TestCosts(unittest.TestCase):
         self.assertEqual(costs.from_station(1, 2), 6)
         self.assertEqual(costs.to_station(2, 1), 7)
 
+    def test_is_constant(self):
+        costs = costs_mod.ConstantCosts(station_ids=range(1, 3), place_ids=range(1, 11), from_station=6, to_station=7)
+        self.assertTrue(costs.is_constant)
+        self.assertEqual((costs.from_const, costs.to_const), (6, 7))
+        self.assertTrue(costs_mod.ZeroCosts().is_constant)
+        self.assertFalse(costs_mod.DictCosts(costs).is_constant)
+
+    def test_max_costs(self):
+        costs = costs_mod.ConstantCosts(station_ids=range(1, 3), place_ids=range(1, 11), from_station=6, to_station=7)
+        self.assertEqual(costs_mod.max_costs(costs, costs.station_ids, costs.place_ids), (6, 7))
+        costs = costs_mod.DictCosts(costs)
+        costs.set_to_station(3, 2, 9)
+        self.assertEqual(costs_mod.max_costs(costs, costs.station_ids, costs.place_ids), (6, 9))
+        # The costs of the objects module have no is_constant attribute.
+        costs = objects.ConstantCosts(station_ids=[1], place_ids=range(1, 5), from_station=2)
+        self.assertEqual(costs_mod.max_costs(costs, [1], range(1, 5)), (2, 2))
+
     def test_dict_copy(self):
         costs_a = costs_mod.ConstantCosts(station_ids=range(1, 3), place_ids=range(1, 11), from_station=6, to_station=7)
         costs_b = costs_mod.DictCosts(costs_a)
@@ -51,14 +70,88 @@ class TestCosts(unittest.TestCase):
                 b = costs_b.to_station(place_id, station_id)
                 self.assertEqual(a, b)
 
+    def test_dict_rows(self):
+        costs_a = costs_mod.ConstantCosts(station_ids=range(1, 3), place_ids=range(1, 11), from_station=6, to_station=7)
+        costs_b = costs_mod.DictCosts(costs_a)
+        self.assertEqual(costs_b.from_station_row(2).shape, (11,))
+        self.assertEqual(costs_b.from_station_row(2)[10], 6)
+        self.assertEqual(costs_b.to_station_col(2).shape, (11,))
+        self.assertEqual(costs_b.to_station_col(2)[10], 7)
+        costs_b.set_from_station(1, 3, 8)
+        self.assertEqual(costs_b.from_station_dict[1][3], 8)
+
+    def test_dict_resize(self):
+        costs = costs_mod.DictCosts(capacity=(2, 3))
+        costs.set_num_stations(2)
+        costs.set_num_places(3)
+        costs.set_from_station(2, 3, 5)
+        costs.set_to_station(3, 2, 6)
+        # Grow beyond the capacity, the costs are kept.
+        costs.set_num_places(10)
+        self.assertEqual(costs.from_station(2, 3), 5)
+        self.assertEqual(costs.to_station(3, 2), 6)
+        self.assertEqual(costs.from_station_row(2).shape, (11,))
+        # Shrink and grow again, the removed costs are gone.
+        costs.set_num_stations(1)
+        self.assertEqual(list(costs.station_ids), [1])
+        costs.set_num_stations(2)
+        self.assertEqual(costs.from_station(2, 3), 0)
+        self.assertEqual(costs.to_station(3, 2), 0)
+
+    def test_dict_bulk_set(self):
+        costs_a = costs_mod.ConstantCosts(station_ids=range(1, 3), place_ids=range(1, 11), from_station=6, to_station=7)
+        costs_a = costs_mod.DictCosts(costs_a)
+        costs_a.set_from_station(2, 3, 8)
+        costs_b = costs_mod.DictCosts(capacity=(2, 10))
+        costs_b.set_num_stations(2)
+        costs_b.set_num_places(10)
+        # String keys like in JSON files.
+        costs_b.set_from_station_dict({str(s): {str(p): c for (p, c) in places.items()}
+                                       for (s, places) in costs_a.from_station_dict.items()})
+        costs_b.set_to_station_dict(costs_a.to_station_dict)
+        self.assertEqual(costs_b.from_station_dict, costs_a.from_station_dict)
+        self.assertEqual(costs_b.to_station_dict, costs_a.to_station_dict)
+
     def test_average_costs(self):
         costs_a = costs_mod.ConstantCosts(station_ids=range(1, 3), place_ids=range(1, 11), from_station=6, to_station=7)
         station_weights = {1: 1 / 2, 2: 1 / 2}
         costs_avg = costs_mod.AverageCosts(costs_a, station_weights)
         costs_avg.from_station(1, 3)
         costs_avg.to_station(3, 1)
-        costs_avg.average_mapping[3]
-        costs_avg.estimated_mapping[1][3]
+        self.assertEqual(costs_avg.average_mapping[3], 13)
+        self.assertEqual(costs_avg.estimated_mapping[1][3], 13)
+        self.assertEqual(costs_avg.estimated_mapping[1, 3], 13)
+
+    def test_deterministic_batch(self):
+        costs_a = costs_mod.ConstantCosts(station_ids=range(1, 3), place_ids=range(1, 11), from_station=6, to_station=7)
+        costs_avg = costs_mod.AverageCosts(costs_a, {1: 1 / 2, 2: 1 / 2})
+        from_station_ids = numpy.array([1, 2, 2])
+        place_ids = numpy.array([3, 4, 10])
+        to_station_ids = numpy.array([2, costs_mod.INVALID_ID, 1])
+        costs = costs_avg.deterministic_batch(from_station_ids, place_ids, to_station_ids)
+        self.assertEqual(costs.tolist(), [costs_avg.deterministic(*ids) for ids in
+                                          zip(from_station_ids, place_ids, to_station_ids)])
+
+    def test_cost_matrices(self):
+        costs = costs_mod.ConstantCosts(station_ids=range(1, 3), place_ids=range(1, 11), from_station=6, to_station=7)
+        from_station, to_station = costs_mod.get_cost_matrices(costs)
+        self.assertEqual(from_station.shape, (3, 11))
+        self.assertEqual(to_station.shape, (11, 3))
+        self.assertEqual(from_station[2, 10], 6)
+        self.assertEqual(to_station[10, 2], 7)
+        # Invalid IDs have no costs.
+        self.assertEqual(from_station[0, 1], 0)
+        self.assertEqual(to_station[1, 0], 0)
+
+    def test_matrix_costs(self):
+        costs_a = costs_mod.ConstantCosts(station_ids=range(1, 3), place_ids=range(1, 11), from_station=6, to_station=7)
+        costs_b = costs_mod.MatrixCosts(*costs_mod.get_cost_matrices(costs_a))
+        self.assertListEqual(list(costs_a.station_ids), list(costs_b.station_ids))
+        self.assertListEqual(list(costs_a.place_ids), list(costs_b.place_ids))
+        for station_id in costs_a.station_ids:
+            for place_id in costs_a.place_ids:
+                self.assertEqual(costs_a.from_station(station_id, place_id), costs_b.from_station(station_id, place_id))
+                self.assertEqual(costs_a.to_station(place_id, station_id), costs_b.to_station(place_id, station_id))
 
 
 if __name__ == '__main__':
@@ -21,6 +21,7 @@
 """
 
 import unittest
+import numpy
 import objects
 from prp.core.warehouse import Warehouse
 import simple
@@ -37,6 +38,15 @@ class OneCosts(objects.Costs):
         return 1
 
 
+class SlowMarkovianGenerator(departure_generators.MarkovianGenerator):
+    """Generate departures with numpy.random.choice instead of the compiled kernel."""
+
+    __slots__ = ()
+
+    def _generate(self):
+        return self._generate_slow()
+
+
 class TestSystem(unittest.TestCase):
     """Test station."""
 
@@ -69,6 +79,16 @@ class TestSystem(unittest.TestCase):
             place_id = solver.decide_new_place(place_id)
 
 
+    def test_deterministic_copy(self):
+        tasks = departure_generators.DeterministicDepartures([(1, 1), (2, 1), (3, 2)])
+        tasks.next()
+        other = departure_generators.DeterministicDepartures(tasks)
+        tasks.next()
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(len(other), 2)
+        self.assertEqual(other.current(), (2, 1))
+        self.assertEqual(other.departures.tolist(), [[2, 1], [3, 2]])
+
     def test_markovian_tasks(self):
         warehouse = self.create_simple_system()
         pod_weights = dict(zip(list(range(1, 10 + 1)), [0.5 - 0.005, 0.001,
@@ -84,6 +104,54 @@ class TestSystem(unittest.TestCase):
             place_id = solver.decide_new_place()
             require_decision = warehouse.next(place_id)
 
+    def test_markovian_kernel(self):
+        """The kernel must draw the same pods as numpy.random.choice for the same seed."""
+        departures = []
+        # More than 128 pods, numpy sums the weights in blocks then.
+        npods = 300
+        pod_weights = departure_generators.get_geometric_weights(npods, 100)
+        for generator_class in [departure_generators.MarkovianGenerator, SlowMarkovianGenerator]:
+            warehouse = Warehouse()
+            warehouse.set_num_places(npods)
+            warehouse.set_num_pods(npods)
+            warehouse.set_costs(OneCosts())
+            for place_id in range(1, npods + 1):
+                warehouse.assign_pod_to_place(place_id, place_id)
+            warehouse.add_station(objects.Station(id=1, n=3))
+            warehouse.add_station(objects.Station(id=2, n=3))
+            numpy.random.seed(1)
+            tasks = generator_class(warehouse, pod_weights, {1: 0.3, 2: 0.7}, n=500)
+            warehouse.set_departure_generator(tasks)
+            departures.append([])
+            while not warehouse.finished():
+                departures[-1].append(tasks.current())
+                warehouse.next(warehouse.available_places[-1])
+        self.assertEqual(len(departures[0]), 500)
+        self.assertEqual(departures[0], departures[1])
+
+    def test_uniform_tasks(self):
+        warehouse = self.create_simple_system()
+        tasks = departure_generators.UniformGenerator({1: 1 / 2, 2: 1 / 2}, warehouse, n=100)
+        warehouse.set_departure_generator(tasks)
+        while not warehouse.finished():
+            (pod_id, station_id) = tasks.current()
+            # Only pods in the storage area can depart.
+            self.assertIn(pod_id, list(warehouse.place_to_pod.values()))
+            self.assertIn(station_id, [1, 2])
+            warehouse.next(warehouse.available_places[0])
+        self.assertEqual(warehouse.t, 100)
+
+    def test_markovian_candidates(self):
+        warehouse = self.create_simple_system()
+        pod_weights = dict(zip(list(range(1, 10 + 1)), 10 * [0.1]))
+        tasks = departure_generators.MarkovianGenerator(warehouse, pod_weights, {1: 1 / 2, 2: 1 / 2}, n=100)
+        warehouse.set_departure_generator(tasks)
+        while not warehouse.finished():
+            warehouse.next(warehouse.available_places[0])
+            # The candidates are updated by the warehouse.
+            self.assertEqual(tasks._get_departure_candidates().tolist(),
+                             sorted(pod_id for pod_id in warehouse.place_to_pod.values() if pod_id != 0))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -61,6 +61,22 @@ class TestStation(unittest.TestCase):
                 former_head = station.dequeue()
                 self.assertEqual(former_head, pod_must_be)
 
+    def test_station_wrap_around(self):
+        """Test a station whose queue head moves around the end of its buffer."""
+        station = objects.Station(1, n=3)
+        for pod_id in [1, 2, 3]:
+            station.enqueue(pod_id)
+        self.assertEqual(station.enqueue(4), 1)
+        self.assertEqual(station.enqueue(5), 2)
+        self.assertEqual(station.state, [3, 4, 5])
+        self.assertEqual(station.head(), 3)
+        self.assertIn(5, station)
+        self.assertNotIn(1, station)
+        self.assertTrue(station.is_full())
+        station.state = [7]
+        self.assertEqual(station.dequeue(), 7)
+        self.assertEqual(station.head(), objects.INVALID_ID)
+
     def test_cost(self):
         costs = objects.ConstantCosts(station_ids=range(1, 3), place_ids=range(1, 11), from_station=5)
         self.assertEqual(costs.from_station(1, 2), 5)
@@ -0,0 +1,149 @@
+# Pod Repositioning Problem
+# Copyright (C) 2017, 2018 Arbeitsgruppe OR an der Leuphana Universität Lüneburg
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Test the compiled simulations of the solvers against the solvers with the warehouse object."""
+
+import unittest
+import numpy
+import prp.core.objects as objects
+import prp.core.costs as costs_mod
+import prp.core.departure_generators as departure_generators
+import prp.kernels as kernels
+from prp.core.warehouse import Warehouse
+from prp.solvers.simple import CheapestPlaceSolver, CostsType
+import prp.solvers.evolution_only_free as evolution_only_free
+import prp.solvers.priority_a as priority_a
+import prp.solvers.priority_b as priority_b
+
+NUM_PLACES = 12
+NUM_PODS = 8
+NUM_DEPARTURES = 60
+
+
+def create_problem(seed):
+    """Return a warehouse with random integer costs and random deterministic departures."""
+    random_state = numpy.random.RandomState(seed)
+    warehouse = Warehouse()
+    warehouse.set_num_places(NUM_PLACES)
+    warehouse.set_num_pods(NUM_PODS)
+    for pod_id in range(1, NUM_PODS + 1):
+        warehouse.assign_pod_to_place(pod_id, pod_id)
+    warehouse.add_station(objects.Station(id=1, n=2))
+    warehouse.add_station(objects.Station(id=2, n=2))
+    # Small integer costs, so that there are ties between the places.
+    costs = costs_mod.DictCosts(capacity=(2, NUM_PLACES))
+    costs.set_num_stations(2)
+    costs.set_num_places(NUM_PLACES)
+    for station_id in range(1, 3):
+        for place_id in range(1, NUM_PLACES + 1):
+            costs.set_from_station(station_id, place_id, random_state.randint(1, 5))
+            costs.set_to_station(place_id, station_id, random_state.randint(1, 5))
+    warehouse.set_costs(costs)
+    # The pods in the storage area do not depend on the places, so departures of any solver fit every solver.
+    pods = list(range(1, NUM_PODS + 1))
+    queues = {1: [], 2: []}
+    departures = []
+    for _ in range(NUM_DEPARTURES):
+        (pod_id, station_id) = (pods.pop(random_state.randint(len(pods))), random_state.randint(1, 3))
+        departures.append((pod_id, station_id))
+        queues[station_id].append(pod_id)
+        if len(queues[station_id]) > 2:
+            pods.append(queues[station_id].pop(0))
+    warehouse.set_departure_generator(departure_generators.DeterministicDepartures(departures))
+    return warehouse
+
+
+class TestSolvers(unittest.TestCase):
+
+    def test_simulate_cheapest_place(self):
+        for seed in range(10):
+            warehouse = create_problem(seed)
+            state = kernels.get_state_arrays(warehouse)
+            departures = numpy.array(warehouse.departure_generator.departures, dtype=numpy.int32)
+            (from_station, to_station) = costs_mod.get_cost_matrices(warehouse.costs)
+            decisions = numpy.zeros(len(departures), dtype=numpy.int32)
+            total_costs = kernels.simulate_cheapest_place(*[a.copy() for a in state], departures, from_station,
+                                                          to_station, decisions, 0)
+
+            solver = CheapestPlaceSolver(warehouse, costs_type=CostsType.DECISION)
+            places = []
+            while not warehouse.finished():
+                places.append(solver.decide_new_place()[0])
+                warehouse.next(places[-1])
+            self.assertEqual(decisions.tolist(), places)
+            self.assertEqual(total_costs, warehouse.total_costs)
+
+    def test_evaluate_only_free(self):
+        random_state = numpy.random.RandomState(0)
+        for seed in range(10):
+            warehouse = create_problem(seed)
+            helper = evolution_only_free.Helper(warehouse, list(random_state.permutation(NUM_PLACES) + 1))
+            # The genome needs a gene for every pod which leaves a station.
+            num_genes = NUM_DEPARTURES - 4
+            for _ in range(3):
+                individual = random_state.randint(0, helper.max_action(), num_genes).tolist()
+                self.assertEqual(helper.evaluate(individual), helper.evaluate_slow(individual))
+            # A too short genome leaves a pod at a full station, that is infeasible.
+            individual = random_state.randint(0, helper.max_action(), num_genes - 1).tolist()
+            self.assertEqual(helper.evaluate(individual), (helper.infeasible_costs,))
+            with self.assertRaises(Exception):
+                helper.evaluate_slow(individual)
+            # The original warehouse is not changed by the evaluation.
+            self.assertEqual(warehouse.t, 0)
+
+    def test_evaluate_only_free_object_costs(self):
+        """The costs of prp.core.objects do not know their stations and places."""
+        warehouse = create_problem(0)
+        warehouse.set_costs(objects.ConstantCosts(station_ids=[1, 2], place_ids=range(1, NUM_PLACES + 1),
+                                                  from_station=2, to_station=3))
+        helper = evolution_only_free.Helper(warehouse, list(range(1, NUM_PLACES + 1)))
+        individual = list(range(NUM_DEPARTURES - 4))
+        self.assertEqual(helper.evaluate(individual), helper.evaluate_slow(individual))
+
+    def test_constant_costs(self):
+        """Solvers must work with costs which do not know their stations and places."""
+        for solver_type in (CheapestPlaceSolver, priority_a.Solver, priority_b.Solver):
+            warehouse = Warehouse()
+            warehouse.set_num_places(4)
+            warehouse.set_num_pods(3)
+            warehouse.set_costs(objects.ConstantCosts(station_ids=[1], place_ids=range(1, 5), from_station=2,
+                                                      to_station=3))
+            for pod_id in range(1, 4):
+                warehouse.assign_pod_to_place(pod_id, pod_id)
+            warehouse.add_station(objects.Station(id=1, n=1))
+            warehouse.set_departure_generator(departure_generators.DeterministicDepartures([(1, 1), (2, 1), (3, 1),
+                                                                                            (1, 1)]))
+            self.assertEqual(warehouse.costs.from_station(1, 4), 2)
+            self.assertEqual(warehouse.costs.to_station(4, 1), 3)
+            solver = solver_type(warehouse)
+            known_departures = priority_b.KnownData(warehouse.departure_generator, warehouse.t)
+            places = []
+            while not warehouse.finished():
+                if solver_type is priority_b.Solver:
+                    known_departures.update_data(warehouse, 10)
+                    solver.update_departures(known_departures.departures_by_station)
+                place_id = solver.decide_new_place()
+                # The simple solvers return the pod and the station together with the place.
+                if isinstance(place_id, tuple):
+                    place_id = place_id[0]
+                places.append(place_id)
+                warehouse.next(place_id)
+            # All places cost the same, the leaving pods go to the free place with the smallest ID.
+            self.assertEqual(places, [0, 1, 2, 1])
+            self.assertEqual(warehouse.total_costs, 3 * (2 + 3) + 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,8 +22,10 @@
 
 import unittest
 import prp.core.objects as objects
+from prp.core.objects import INVALID_ID
 from prp.core.warehouse import Warehouse
 import prp.solvers.simple as simple
+import prp.solvers.evolution as evolution
 import prp.core.departure_generators as task_generators
 
 class OneCosts(objects.Costs):
@@ -64,5 +66,131 @@ class TestSystem(unittest.TestCase):
         while system.next(place_id):
             place_id = solver.decide_new_place()
 
+    def test_replay(self):
+        systems = []
+        for _ in range(2):
+            system = Warehouse()
+            system.set_num_places(4)
+            system.set_num_pods(3)
+            system.set_costs(objects.ConstantCosts(station_ids=[1], place_ids=range(1, 5), from_station=2,
+                                                   to_station=3))
+            for pod_id in range(1, 4):
+                system.assign_pod_to_place(pod_id, pod_id)
+            system.add_station(objects.Station(id=1, n=1))
+            system.set_departure_generator(task_generators.DeterministicDepartures([(1, 1), (2, 1), (3, 1), (1, 1)]))
+            systems.append(system)
+        places = [0, 4, 1, 2]
+        for place_id in places:
+            systems[0].next(place_id)
+        self.assertFalse(systems[1].replay(places))
+        self.assertEqual(systems[1].total_costs, systems[0].total_costs)
+        self.assertEqual(systems[1].t, 4)
+        self.assertEqual(list(systems[1].place_to_pod.values()), list(systems[0].place_to_pod.values()))
+        self.assertEqual(systems[1].stations[1].state, [1])
+
+    def test_infeasible_costs(self):
+        """Costs of the objects module do not have the is_constant attribute."""
+        system = Warehouse()
+        system.set_num_places(4)
+        system.set_num_pods(3)
+        system.set_costs(objects.ConstantCosts(station_ids=[1], place_ids=range(1, 5), from_station=2))
+        system.add_station(objects.Station(id=1, n=1))
+        self.assertEqual(evolution.Helper(system).infeasible_costs, 40)
+
+    def test_set_costs(self):
+        system = Warehouse()
+        system.set_num_places(2)
+        system.set_num_pods(2)
+        system.set_costs(OneCosts())
+        system.assign_pod_to_place(1, 1)
+        system.assign_pod_to_place(2, 2)
+        system.add_station(objects.Station(id=1, n=1))
+        system.set_departure_generator(task_generators.DeterministicDepartures([(1, 1), (2, 1)]))
+        system.next(INVALID_ID)
+        self.assertEqual(system.total_costs, 1)
+        # New costs must be used in the next step.
+        system.set_costs(objects.ConstantCosts(station_ids=[1], place_ids=[1, 2], from_station=5))
+        system.next(1)
+        self.assertEqual(system.total_costs, 11)
+
+    def test_snapshot(self):
+        system = Warehouse()
+        system.set_num_places(10)
+        system.set_num_pods(10)
+        system.set_costs(OneCosts())
+        for place_id in range(1, 10+1):
+            system.assign_pod_to_place(place_id, place_id)
+        system.add_station(objects.Station(id=1, n=3))
+        system.add_station(objects.Station(id=2, n=3))
+        tasks = task_generators.DeterministicDepartures(
+            [(1, 1), (2, 1), (3, 1), (4, 1), (5, 2), (6, 2), (7, 2), (8, 2), (9, 1), (10, 2)])
+        system.set_departure_generator(tasks)
+
+        for place_id in [0, 0, 0]:
+            system.next(place_id)
+        state = system.snapshot()
+        # Solve the rest twice, the second time from the restored state.
+        for _ in range(2):
+            system.restore(state)
+            self.assertEqual(system.t, 3)
+            self.assertEqual(system.available_places, [1, 2, 3, 4])
+            for place_id in [3, 0, 0, 0, 8, 9, 10]:
+                system.next(place_id)
+            self.assertTrue(system.finished())
+            self.assertEqual(system.total_costs, 14)
+
+    def test_snapshot_generator_warehouse(self):
+        """A restored generator must still be bound to its warehouse and not to a copy."""
+        system = Warehouse()
+        system.set_num_places(4)
+        system.set_num_pods(3)
+        system.set_costs(OneCosts())
+        for pod_id in range(1, 4):
+            system.assign_pod_to_place(pod_id, pod_id)
+        system.add_station(objects.Station(id=1, n=1))
+        tasks = task_generators.CyclicGenerator({1: 1.0}, system, n=10)
+        system.set_departure_generator(tasks)
+        system.next(INVALID_ID)
+        state = system.snapshot()
+        system.next(4)
+        system.restore(state)
+        self.assertIs(tasks.warehouse, system)
+        self.assertEqual(system.t, 1)
+        system.next(4)
+        self.assertEqual(system.place_to_pod[4], 1)
+
+    def test_arrays(self):
+        system = Warehouse()
+        system.set_num_places(4)
+        system.set_num_pods(3)
+        system.set_costs(OneCosts())
+        system.assign_pod_to_place(1, 2)
+        system.assign_pod_to_place(2, 4)
+        system.add_station(objects.Station(id=1, n=2))
+        system.assign_pod_to_station(3, 1)
+
+        state = system.to_arrays()
+        self.assertEqual(state.place_to_pod.tolist(), [0, 0, 1, 0, 2])
+        self.assertEqual(state.pod_to_place.tolist(), [0, 2, 4, 0])
+        self.assertEqual(state.queues.tolist(), [[0, 0], [3, 0]])
+        self.assertEqual(state.queue_lengths.tolist(), [0, 1])
+        self.assertEqual(state.max_n.tolist(), [0, 2])
+        self.assertEqual(system.station_of_the_pod(3), 1)
+        self.assertIsNone(system.station_of_the_pod(1))
+
+        # Swap the pods of the places 2 and 4 and read the state back.
+        state.place_to_pod[2], state.place_to_pod[4] = 2, 1
+        system.from_arrays(state)
+        self.assertEqual(system.place_by_pod(1), 4)
+        self.assertEqual(system.place_by_pod(2), 2)
+        self.assertEqual(system.stations[1].state, [3])
+
+        system.set_num_places(5)
+        self.assertTrue(system.place_is_free(5))
+        self.assertEqual(system.place_to_pod.free_places, [1, 3, 5])
+        system.set_num_places(3)
+        self.assertEqual(system.place_to_pod.values(), [0, 2, 0])
+        self.assertIsNone(system.place_by_pod(1))
+
 if __name__ == '__main__':
     unittest.main()